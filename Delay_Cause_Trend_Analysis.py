@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
 import warnings
 
-from src.trend_flight_year import trend_flight_year
-from src.delay_cause_proportion import delay_cause_proportion
-from src.delay_cause_stackbar import delay_cause_stacked_bar
+from src.aggregate_store import load_aggregate_store
+from src.month_windows import complete_seasons
+from src.partitions import resolve_dataset_path
+from src.memory_cache import cache_usage_sidebar
+from src.startup import readiness_status
 
 warnings.filterwarnings('ignore')
 
@@ -25,33 +26,32 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Read csv file
-@st.cache_data
-def load_data():
-    return pd.read_csv('src/dataset/Airline_Delay_Cause_Data_Processing.csv')
-
-df = load_data()
+# Map the shared precomputed aggregates (built from the csv file on first use)
+with readiness_status():
+    store = load_aggregate_store(resolve_dataset_path('src/dataset/Airline_Delay_Cause_Data_Processing.csv'))
 
 st.write("")
 st.write("")
 
-# Airline academic years from 2013/2014 to 2022/2023
-valid_years = [f"{y}/{y+1}" for y in range(2013, 2023)]  # ['2013/2014', ..., '2022/2023']
+# Airline academic years fully covered by the data (2013/2014 to 2022/2023 for the shipped csv)
+valid_years = complete_seasons(store)
+first_end_year = int(valid_years[0][-4:])
+last_end_year = int(valid_years[-1][-4:])
 
 st.markdown("<h2 style='font-size: 16px;'>Select Year Range (based on end year)</h2>", unsafe_allow_html=True)
 
-# Slider from 2014 to 2023 (which maps to indices 0 to 9 of valid_years)
+# Slider over end years (2014 = 2013/2014), mapping to indices of valid_years
 selected_years_int = st.slider(
     "Enter range here",
-    min_value=2014,
-    max_value=2023,
-    value=(2014, 2023),
+    min_value=first_end_year,
+    max_value=last_end_year,
+    value=(first_end_year, last_end_year),
     step=1
 )
 
-# Map 2014–2023 to "2013/2014"–"2022/2023"
-start_index = selected_years_int[0] - 2014  # e.g. 2014 -> 0
-end_index = selected_years_int[1] - 2014    # e.g. 2023 -> 9
+# Map end years to seasons, e.g. 2014 -> "2013/2014"
+start_index = selected_years_int[0] - first_end_year
+end_index = selected_years_int[1] - first_end_year
 selected_years = valid_years[start_index:end_index + 1]
 
 # Optional: Show the mapped academic years
@@ -59,22 +59,35 @@ st.write(f"Selected Years: {selected_years[0]} to {selected_years[-1]}")
 
 st.write("")
 
+# Chart modules are imported right before they render, so the page header and store come up first
 # -----------------------------------------------------------------------------------------------------
 col1, col2 = st.columns(2)
 # -----------------------------------------------------------------------------------------------------
 
 ## Graph 1: Tren Penyebab Keterlambatan Penerbangan per Tahun
 with col1:
-    trend_flight_year(df, selected_years)
+    from src.trend_flight_year import trend_flight_year
+    trend_flight_year(store, selected_years)
 # -----------------------------------------------------------------------------------------------------
 # -----------------------------------------------------------------------------------------------------
 ## Graph 2: Tren Penyebab Keterlambatan Penerbangan per Bulan
 with col2:
-    delay_cause_proportion(df, selected_years)
+    from src.delay_cause_proportion import delay_cause_proportion
+    delay_cause_proportion(store, selected_years)
 # -----------------------------------------------------------------------------------------------------
 
 
 # -----------------------------------------------------------------------------------------------------
 ## Graph 3: Stacked Bar Chart Penyebab Keterlambatan per Tahun
-delay_cause_stacked_bar(df, selected_years)
-# -----------------------------------------------------------------------------------------------------
\ No newline at end of file
+from src.delay_cause_stackbar import delay_cause_stacked_bar
+delay_cause_stacked_bar(store, selected_years)
+# -----------------------------------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------------------------------
+## Graph 4: Delay Trend for Arbitrary Month Windows (calendar year, rolling 12 months, custom range)
+from src.period_delay_trend import period_delay_trend
+period_delay_trend(store)
+# -----------------------------------------------------------------------------------------------------
+
+# Memory used by cached aggregates and figures in this process
+cache_usage_sidebar()
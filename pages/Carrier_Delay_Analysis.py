@@ -2,8 +2,14 @@ import streamlit as st
 import pandas as pd
 import warnings
 import os
-from src.average_carrier_delay import average_carrier_delay, load_and_prepare_data
+from src.partitions import resolve_dataset_path
+from src.average_carrier_delay import average_carrier_delay, carrier_disruptions
+from src.aggregate_store import load_aggregate_store
+from src.month_windows import complete_seasons
 from src.carrier_delay_trend import carrier_delay_trend_and_cause
+from src.cross_filter import STATE_FILTER_KEY, cross_filter_banner, describe_state_filter, get_state_filter
+from src.memory_cache import cache_usage_sidebar
+from src.startup import readiness_status
 
 # Set page config
 st.set_page_config(page_title="U.S. Flight Delay Analysis (2013-2023)", layout="wide")
@@ -25,37 +31,56 @@ st.markdown(
 # Read csv file
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 csv_path = os.path.join(BASE_DIR, "..", "src", "dataset", "Airline_Delay_Cause_Data_Processing.csv")
-df = load_and_prepare_data(csv_path)
+dataset_path = resolve_dataset_path(csv_path)
+with readiness_status():
+    store = load_aggregate_store(dataset_path)
 
 st.write("")
 st.write("")
 
-# Airline academic years from 2013/2014 to 2022/2023
-valid_years = [f"{y}/{ y +1}" for y in range(2013, 2023)]  # ['2013/2014', ..., '2022/2023']
+# Airline academic years fully covered by the data (2013/2014 to 2022/2023 for the shipped csv)
+valid_years = complete_seasons(store)
+first_end_year = int(valid_years[0][-4:])
+last_end_year = int(valid_years[-1][-4:])
 
 st.markdown("<h2 style='font-size: 16px;'>Select Year Range (based on end year)</h2>", unsafe_allow_html=True)
 
-# Slider from 2014 to 2023 (which maps to indices 0 to 9 of valid_years)
+# Slider over end years (2014 = 2013/2014), mapping to indices of valid_years
 selected_years_int = st.slider(
     "Enter range here",
-    min_value=2014,
-    max_value=2023,
-    value=(2014, 2023),
+    min_value=first_end_year,
+    max_value=last_end_year,
+    value=(first_end_year, last_end_year),
     step=1
 )
 
-# Map 2014–2023 to "2013/2014"–"2022/2023"
-start_index = selected_years_int[0] - 2014  # e.g. 2014 -> 0
-end_index = selected_years_int[1] - 2014    # e.g. 2023 -> 9
+# Map end years to seasons, e.g. 2014 -> "2013/2014"
+start_index = selected_years_int[0] - first_end_year
+end_index = selected_years_int[1] - first_end_year
 selected_years = valid_years[start_index:end_index + 1]
 st.write(f"Selected Years: {selected_years[0]} to {selected_years[-1]}")
 
+# State picked on the State page map, if any
+state_filter = get_state_filter()
+cross_filter_banner(STATE_FILTER_KEY, describe_state_filter)
+
+# One fused carrier x season aggregate of every measure feeds all charts on this page
+carrier_season = store.aggregate(keep=('season', 'carrier'), season=selected_years, state=state_filter)
+
 st.write("")
 
 # === Average Carrier Delay ===
-average_carrier_delay(df, selected_years)
+average_carrier_delay(store, carrier_season, selected_years, state_filter)
+
+st.write("")
+
+# === Cancellations & Diversions ===
+carrier_disruptions(store, carrier_season, selected_years, state_filter)
 
 st.write("")
 
 # === NEW: Trend & Stacked Bar for 2 Carriers ===
-carrier_delay_trend_and_cause(df, selected_years)
\ No newline at end of file
+carrier_delay_trend_and_cause(dataset_path, store, carrier_season, selected_years, state_filter)
+
+# Memory used by cached aggregates and figures in this process
+cache_usage_sidebar()
@@ -0,0 +1,65 @@
+import streamlit as st
+import os
+from src.partitions import resolve_dataset_path
+from src.aggregate_store import load_aggregate_store
+from src.month_windows import complete_seasons
+from src.delay_anomalies import delay_anomalies
+from src.memory_cache import cache_usage_sidebar
+from src.startup import readiness_status
+
+# Set page config
+st.set_page_config(page_title="U.S. Flight Delay Analysis (2013-2023)", layout="wide")
+
+st.markdown(
+    """
+    <div style='
+    '>
+        <h1 style='margin-top: 0;'>✈️ U.S. Flight Delay Dashboard Analysis</h1>
+        <h2 style='font-size: 24px; font-weight: bold;'>
+            Delay Anomalies
+        </h2>
+    </div>
+    """,
+    unsafe_allow_html=True
+)
+
+
+# Read csv file
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+csv_path = os.path.join(BASE_DIR, "..", "src", "dataset", "Airline_Delay_Cause_Data_Processing.csv")
+dataset_path = resolve_dataset_path(csv_path)
+with readiness_status():
+    store = load_aggregate_store(dataset_path)
+
+st.write("")
+st.write("")
+
+# Airline academic years fully covered by the data (2013/2014 to 2022/2023 for the shipped csv)
+valid_years = complete_seasons(store)
+first_end_year = int(valid_years[0][-4:])
+last_end_year = int(valid_years[-1][-4:])
+
+st.markdown("<h2 style='font-size: 16px;'>Select Year Range (based on end year)</h2>", unsafe_allow_html=True)
+
+# Slider over end years (2014 = 2013/2014), mapping to indices of valid_years
+selected_years_int = st.slider(
+    "Enter range here",
+    min_value=first_end_year,
+    max_value=last_end_year,
+    value=(first_end_year, last_end_year),
+    step=1
+)
+
+# Map end years to seasons, e.g. 2014 -> "2013/2014"
+start_index = selected_years_int[0] - first_end_year
+end_index = selected_years_int[1] - first_end_year
+selected_years = valid_years[start_index:end_index + 1]
+st.write(f"Selected Years: {selected_years[0]} to {selected_years[-1]}")
+
+st.write("")
+
+# === Carrier x Airport Months that Break from their Baseline ===
+delay_anomalies(dataset_path, store, selected_years)
+
+# Memory used by cached aggregates and figures in this process
+cache_usage_sidebar()
@@ -0,0 +1,453 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.delay_causes import CAUSE_COUNT_COLUMNS, CAUSE_MINUTE_COLUMNS
+from src.disk_cache import disk_cache, disk_cached
+from src.entity_search import build_search_entries
+from src.fused_aggregation import fused_group_sums, fused_to_frame
+from src.memory_cache import memory_cache
+from src.partitions import get_dataset_files, read_dataset, resolve_dataset_path
+from src.startup import mark_ready
+from src.utils import get_airline_year_column
+
+logger = logging.getLogger(__name__)
+
+# Binary layout: magic, header length, JSON header, padding, then the raw arrays.
+# Arrays start on a page boundary so every worker maps the same pages read-only.
+STORE_MAGIC = b'USADAGG1'
+STORE_VERSION = 5
+PAGE_SIZE = 4096
+
+# Seconds between checks of the dataset files for a new version
+WATCH_INTERVAL = float(os.environ.get('DASHBOARD_WATCH_INTERVAL', 5))
+
+# Additive measures summed for every season x carrier x state cell
+MEASURES = (
+    ['arr_flights', 'arr_del15']
+    + CAUSE_COUNT_COLUMNS
+    + ['arr_cancelled', 'arr_diverted', 'arr_delay']
+    + CAUSE_MINUTE_COLUMNS
+)
+
+CUBE_NAME = 'season_carrier_state'
+CUBE_DIMS = ['season', 'carrier', 'state', 'measure']
+
+# Running totals per calendar month (one extra leading row of zeros), total and per entity.
+# The sums of any contiguous month window are prefix[end + 1] - prefix[start].
+PREFIX_ARRAYS = {
+    None: ('month_total_prefix', ['month', 'measure']),
+    'carrier': ('month_carrier_prefix', ['month', 'carrier', 'measure']),
+    'state': ('month_state_prefix', ['month', 'state', 'measure']),
+    'airport': ('month_airport_prefix', ['month', 'airport', 'measure']),
+}
+
+# Per-season sums for each ranked entity, so rankings over any season range are one slice and sum
+SEASON_ARRAYS = {
+    'carrier': ('season_carrier', ['season', 'carrier', 'measure']),
+    'state': ('season_state', ['season', 'state', 'measure']),
+    'airport': ('season_airport', ['season', 'airport', 'measure']),
+}
+
+
+# The dataset is either the flat processed csv or its year/month partition folder
+def get_store_path(dataset_path):
+    return os.path.splitext(dataset_path)[0] + '.aggregates.bin'
+
+# Cheap fingerprint used to detect a replaced or newly added source file without hashing it
+def get_source_fingerprint(dataset_path):
+    stats = [os.stat(path) for path in get_dataset_files(dataset_path)]
+    return {
+        'files': len(stats),
+        'size': sum(stat.st_size for stat in stats),
+        'mtime_ns': max((stat.st_mtime_ns for stat in stats), default=0),
+    }
+
+def get_dataset_hash(dataset_path):
+    digest = hashlib.sha1()
+    for path in get_dataset_files(dataset_path):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_season_cube(df):
+    df = df.copy()
+    if 'airline_year' not in df.columns:
+        df['airline_year'] = get_airline_year_column(df)
+
+    # Rows without a parsed state stay under '' so carrier totals remain complete
+    df['airport_state'] = df['airport_state'].fillna('')
+
+    labels, cube = fused_group_sums(df, ['airline_year', 'carrier_name', 'airport_state'], MEASURES)
+    dims = {'season': labels[0], 'carrier': labels[1], 'state': labels[2], 'measure': MEASURES}
+    return dims, cube
+
+
+def get_month_label(year, month):
+    return f"{year}-{month:02d}"
+
+def build_month_prefix_sums(df, dims):
+    df = df.copy()
+    df['airport_state'] = df['airport_state'].fillna('')
+
+    # Months are numbered from the first month in the data so gaps still get a (zero) row
+    month_number = df['year'] * 12 + df['month'] - 1
+    first_month, last_month = int(month_number.min()), int(month_number.max())
+    df['month_offset'] = month_number - first_month
+
+    labels, cube = fused_group_sums(df, ['month_offset', 'carrier_name', 'airport_state'], MEASURES)
+    carrier_pos = {label: i for i, label in enumerate(dims['carrier'])}
+    state_pos = {label: i for i, label in enumerate(dims['state'])}
+    dense = np.zeros((last_month - first_month + 1, len(dims['carrier']), len(dims['state']), len(MEASURES)))
+    dense[np.ix_(
+        np.array(labels[0], dtype=np.int64),
+        np.array([carrier_pos[label] for label in labels[1]], dtype=np.int64),
+        np.array([state_pos[label] for label in labels[2]], dtype=np.int64),
+    )] = cube
+
+    def prefix(monthly):
+        return np.concatenate([np.zeros((1,) + monthly.shape[1:]), np.cumsum(monthly, axis=0)])
+
+    month_labels = [get_month_label(n // 12, n % 12 + 1) for n in range(first_month, last_month + 1)]
+    arrays = {
+        PREFIX_ARRAYS[None][0]: (PREFIX_ARRAYS[None][1], prefix(dense.sum(axis=(1, 2)))),
+        PREFIX_ARRAYS['carrier'][0]: (PREFIX_ARRAYS['carrier'][1], prefix(dense.sum(axis=2))),
+        PREFIX_ARRAYS['state'][0]: (PREFIX_ARRAYS['state'][1], prefix(dense.sum(axis=1))),
+    }
+    return month_labels, arrays
+
+
+# Season x entity sums; carriers and states roll up from the cube, airports need their own pass
+def build_season_entity_sums(df, dims, cube):
+    df = df.copy()
+    if 'airline_year' not in df.columns:
+        df['airline_year'] = get_airline_year_column(df)
+
+    labels, season_airport = fused_group_sums(df, ['airline_year', 'airport'], MEASURES)
+    season_pos = np.array([dims['season'].index(season) for season in labels[0]], dtype=np.int64)
+    dense = np.zeros((len(dims['season']), len(labels[1]), len(MEASURES)))
+    dense[season_pos] = season_airport
+    dims['airport'] = labels[1]
+
+    # Display label per airport code, from its most recent row
+    latest = df.sort_values(['year', 'month']).drop_duplicates('airport', keep='last').set_index('airport')
+    airport_labels = [
+        f"{code} – {latest.at[code, 'airport_name']}" if pd.notna(latest.at[code, 'airport_name']) else code
+        for code in labels[1]
+    ]
+
+    arrays = {
+        SEASON_ARRAYS['carrier'][0]: (SEASON_ARRAYS['carrier'][1], cube.sum(axis=2)),
+        SEASON_ARRAYS['state'][0]: (SEASON_ARRAYS['state'][1], cube.sum(axis=1)),
+        SEASON_ARRAYS['airport'][0]: (SEASON_ARRAYS['airport'][1], dense),
+    }
+    return arrays, {'airport': airport_labels}
+
+# Monthly running totals per airport, laid out like the carrier and state prefix sums
+def build_airport_month_prefix(df, dims):
+    month_number = df['year'] * 12 + df['month'] - 1
+    first_year, first_month = dims['month'][0].split('-')
+    offsets = month_number - (int(first_year) * 12 + int(first_month) - 1)
+
+    labels, sums = fused_group_sums(df.assign(month_offset=offsets), ['month_offset', 'airport'], MEASURES)
+    airport_pos = {label: i for i, label in enumerate(dims['airport'])}
+    dense = np.zeros((len(dims['month']), len(dims['airport']), len(MEASURES)))
+    dense[np.ix_(
+        np.array(labels[0], dtype=np.int64),
+        np.array([airport_pos[label] for label in labels[1]], dtype=np.int64),
+    )] = sums
+    prefix = np.concatenate([np.zeros((1,) + dense.shape[1:]), np.cumsum(dense, axis=0)])
+    return {PREFIX_ARRAYS['airport'][0]: (PREFIX_ARRAYS['airport'][1], prefix)}
+
+
+def write_aggregate_store(path, dims, arrays, source=None, labels=None, search=None):
+    header = {
+        'version': STORE_VERSION,
+        'source': source or {},
+        'dims': dims,
+        'labels': labels or {},
+        'search': search or [],
+        'arrays': {},
+    }
+
+    # Offsets depend on the header size, so lay the arrays out after a first pass
+    offset = 0
+    for name, (array_dims, array) in arrays.items():
+        header['arrays'][name] = {
+            'dims': array_dims,
+            'dtype': '<f8',
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        offset += -(-array.nbytes // PAGE_SIZE) * PAGE_SIZE
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(STORE_MAGIC) + 8 + len(header_bytes)) // PAGE_SIZE) * PAGE_SIZE
+
+    # Write to a temporary file and rename so readers never see a partial store
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(STORE_MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, (_, array) in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array, dtype='<f8').tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_store_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+            raise ValueError(f"{path} is not an aggregate store file")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    header['data_start'] = -(-(len(STORE_MAGIC) + 8 + header_len) // PAGE_SIZE) * PAGE_SIZE
+    return header
+
+
+class AggregateStore:
+    def __init__(self, path):
+        self.path = path
+        self.header = read_store_header(path)
+        self.dims = self.header['dims']
+        self.dataset_hash = self.header['source'].get('dataset_hash')
+        self.labels = self.header.get('labels', {})
+        self._positions = {
+            dim: {label: i for i, label in enumerate(labels)}
+            for dim, labels in self.dims.items()
+        }
+        self.arrays = {}
+        for name, spec in self.header['arrays'].items():
+            self.arrays[name] = np.memmap(
+                path,
+                dtype=spec['dtype'],
+                mode='r',
+                offset=self.header['data_start'] + spec['offset'],
+                shape=tuple(spec['shape']),
+            )
+
+    @property
+    def seasons(self):
+        return self.dims['season']
+
+    @property
+    def months(self):
+        return self.dims['month']
+
+    # Sums of every month window [starts[i], ends[i]] (inclusive month positions) in constant
+    # time per window, as a (windows x [entities x] measures) array. `by` is None, 'carrier', 'state' or 'airport'.
+    def window_sums(self, starts, ends, by=None):
+        prefix = self.arrays[PREFIX_ARRAYS[by][0]]
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        return prefix[ends + 1] - prefix[starts]
+
+    def positions(self, dim, labels):
+        lookup = self._positions[dim]
+        return np.array([lookup[label] for label in labels if label in lookup], dtype=np.int64)
+
+    # Sum the cube over every dimension not listed in `keep`.
+    # `filters` restrict a dimension to the given labels, e.g. season=[...], state=['CA'].
+    # Airports are not in the cube: keeping or filtering them sums the season x airport array instead.
+    def aggregate(self, keep=(), drop_empty=True, **filters):
+        cube = self.arrays[CUBE_NAME]
+        array_dims = CUBE_DIMS
+        if 'airport' in keep or filters.get('airport') is not None:
+            name, array_dims = SEASON_ARRAYS['airport']
+            cube = self.arrays[name]
+        used = set(keep) | {dim for dim, labels in filters.items() if labels is not None}
+        unsupported = sorted(used - set(array_dims[:-1]))
+        if unsupported:
+            if 'airport' in used:
+                raise ValueError(f"airport sums can't be combined with {', '.join(unsupported)} (only season is stored per airport)")
+            raise ValueError(f"unknown dimensions: {', '.join(unsupported)}")
+        for dim, labels in filters.items():
+            if labels is None:
+                continue
+            if isinstance(labels, str):
+                labels = [labels]
+            cube = np.take(cube, self.positions(dim, labels), axis=array_dims.index(dim))
+
+        reduce_axes = tuple(i for i, dim in enumerate(array_dims[:-1]) if dim not in keep)
+        summed = cube.sum(axis=reduce_axes) if reduce_axes else np.asarray(cube)
+
+        kept = [dim for dim in array_dims[:-1] if dim in keep]
+        if not kept:
+            return pd.Series(summed, index=MEASURES)
+
+        def kept_labels(dim):
+            labels = filters.get(dim)
+            if labels is None:
+                return self.dims[dim]
+            if isinstance(labels, str):
+                labels = [labels]
+            return [label for label in labels if label in self._positions[dim]]
+
+        # Mirror groupby output: combinations without flights are not reported
+        return fused_to_frame([kept_labels(dim) for dim in kept], summed, kept, MEASURES, drop_empty)
+
+
+def build_store_from_dataset(dataset_path, store_path):
+    source = get_source_fingerprint(dataset_path)
+    source['dataset_hash'] = get_dataset_hash(dataset_path)
+    df = read_dataset(dataset_path)
+    dims, cube = build_season_cube(df)
+    month_labels, prefix_arrays = build_month_prefix_sums(df, dims)
+    dims['month'] = month_labels
+    season_arrays, labels = build_season_entity_sums(df, dims, cube)
+    prefix_arrays.update(build_airport_month_prefix(df, dims))
+    write_aggregate_store(
+        store_path,
+        dims,
+        {CUBE_NAME: (CUBE_DIMS, cube), **prefix_arrays, **season_arrays},
+        source=source,
+        labels=labels,
+        search=build_search_entries(df),
+    )
+
+
+def is_store_current(dataset_path, store_path):
+    if not os.path.exists(store_path):
+        return False
+    try:
+        header = read_store_header(store_path)
+    except (ValueError, OSError, json.JSONDecodeError):
+        return False
+    source = header.get('source', {})
+    fingerprint = get_source_fingerprint(dataset_path)
+    return (
+        header.get('version') == STORE_VERSION
+        and all(source.get(key) == value for key, value in fingerprint.items())
+    )
+
+# Open the shared store for a dataset, building it first if it is missing or stale.
+# A lock file makes sure only one worker on the host does the build; the others wait for it.
+def open_aggregate_store(dataset_path, timeout=300):
+    store_path = get_store_path(dataset_path)
+    lock_path = store_path + '.lock'
+    deadline = time.monotonic() + timeout
+
+    while not is_store_current(dataset_path, store_path):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # Break a lock left behind by a crashed builder
+            if time.monotonic() > deadline:
+                os.remove(lock_path)
+                deadline = time.monotonic() + timeout
+            time.sleep(0.2)
+            continue
+        try:
+            os.close(fd)
+            if not is_store_current(dataset_path, store_path):
+                build_store_from_dataset(dataset_path, store_path)
+        finally:
+            os.remove(lock_path)
+
+    return AggregateStore(store_path)
+
+# Holds the current store for a dataset and swaps in a new one when the source files change.
+# The new store is built and mapped in a background thread, then published with a single
+# reference assignment: a rerun that already took the old store finishes on it (its mapping
+# outlives the replaced file), the next rerun gets the new one.
+class DatasetWatcher:
+    def __init__(self, dataset_path, interval=WATCH_INTERVAL):
+        self.dataset_path = dataset_path
+        self.interval = interval
+        self.store = open_aggregate_store(dataset_path)
+        mark_ready(self.store)
+        self.listeners = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name='dataset-watcher', daemon=True)
+        self._thread.start()
+
+    # Fingerprint of the files on disk when it differs from the one the current store was built from
+    def changed_fingerprint(self):
+        try:
+            fingerprint = get_source_fingerprint(self.dataset_path)
+        except OSError:
+            return None
+        source = self.store.header['source']
+        return fingerprint if any(source.get(key) != value for key, value in fingerprint.items()) else None
+
+    def _watch(self):
+        pending = None
+        while not self._stop.wait(self.interval):
+            fingerprint = self.changed_fingerprint()
+            # Only rebuild once the files look the same on two polls in a row, i.e. the copy is done
+            if fingerprint is None or fingerprint != pending:
+                pending = fingerprint
+                continue
+            pending = None
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Reloading %s failed, still serving %s", self.dataset_path, self.store.dataset_hash[:12])
+
+    def reload(self):
+        new_store = open_aggregate_store(self.dataset_path)
+        if not os.path.isdir(self.dataset_path):
+            read_prepared_data(self.dataset_path)
+
+        old_store, self.store = self.store, new_store
+        if new_store.dataset_hash == old_store.dataset_hash:
+            return
+        for listener in self.listeners:
+            listener(old_store, new_store)
+        disk_cache.clear(version=old_store.dataset_hash)
+
+    def stop(self):
+        self._stop.set()
+
+@st.cache_resource(show_spinner=False)
+def watch_dataset(dataset_path):
+    watcher = DatasetWatcher(dataset_path)
+    # In-memory results computed from the old version are dropped with it
+    watcher.listeners.append(lambda old_store, new_store: memory_cache.clear(keep_version=new_store.dataset_hash))
+    return watcher
+
+# Store for this rerun; take it once per rerun so every chart on the page sees the same version
+def load_aggregate_store(dataset_path):
+    return watch_dataset(dataset_path).store
+
+# Content hash of the dataset, read from the store header while the store is current
+def get_dataset_version(dataset_path):
+    store_path = get_store_path(dataset_path)
+    if is_store_current(dataset_path, store_path):
+        return read_store_header(store_path)['source']['dataset_hash']
+    return get_dataset_hash(dataset_path)
+
+# Raw rows with their airline year, kept on disk so restarts skip the csv parse
+@disk_cached('prepared_data', version=get_dataset_version)
+def read_prepared_data(dataset_path):
+    return read_dataset(dataset_path)
+
+# Partitioned datasets are pruned at read time; a flat csv is read whole once and filtered
+def read_rows(dataset_path, selected_years=None):
+    if os.path.isdir(dataset_path):
+        return read_dataset(dataset_path, selected_years)
+    df = read_prepared_data(dataset_path)
+    if selected_years is not None:
+        df = df[df['airline_year'].isin(selected_years)]
+    return df
+
+
+if __name__ == '__main__':
+    import sys
+
+    dataset_file = sys.argv[1] if len(sys.argv) > 1 else resolve_dataset_path(os.path.join('src', 'dataset', 'Airline_Delay_Cause_Data_Processing.csv'))
+    store = open_aggregate_store(dataset_file)
+    shape = store.arrays[CUBE_NAME].shape
+    print(f"{store.path}: {' x '.join(map(str, shape))} ({store.dataset_hash})")
@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from src.aggregate_store import DatasetWatcher
+from src.delay_causes import DELAY_CAUSES, cause_mix
+from src.entity_search import get_search_index
+from src.month_windows import window_frame
+from src.partitions import resolve_dataset_path
+from src.rankings import METRICS_BY_KEY, RANKING_METRICS, rank_entities
+
+# Read-only JSON API over the aggregate store, for tools that want the dashboard's numbers
+# without going through Streamlit. Every response is a pure function of the dataset version
+# and the request, so the dataset hash doubles as the ETag seed and cached bodies never go stale.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_CSV = os.path.join(BASE_DIR, 'src', 'dataset', 'Airline_Delay_Cause_Data_Processing.csv')
+RESPONSE_CACHE_SIZE = 512
+MAX_AGE = 300
+
+logger = logging.getLogger(__name__)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def clean(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [clean(v) for v in value]
+    if hasattr(value, 'item'):
+        return clean(value.item())
+    return value
+
+def get_param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+def get_int_param(params, name, default):
+    value = get_param(params, name)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer")
+
+# Seasons from ?seasons=2019/2020,2020/2021 or an inclusive ?from=...&to=... range (default: all)
+def get_seasons(store, params):
+    seasons = store.seasons
+    listed = get_param(params, 'seasons')
+    if listed:
+        picked = [season.strip() for season in listed.split(',')]
+        unknown = [season for season in picked if season not in seasons]
+        if unknown:
+            raise BadRequest(f"unknown seasons: {', '.join(unknown)}")
+        return [season for season in seasons if season in picked]
+
+    start = get_param(params, 'from', seasons[0])
+    end = get_param(params, 'to', seasons[-1])
+    for season in (start, end):
+        if season not in seasons:
+            raise BadRequest(f"unknown season: {season}")
+    return seasons[seasons.index(start):seasons.index(end) + 1]
+
+
+## Endpoints: each takes the store and the parsed query string and returns a JSON-able value
+
+def seasons_endpoint(store, params):
+    yearly = store.aggregate(keep=('season',), season=get_seasons(store, params))
+    return [
+        {
+            'season': season,
+            'flights': row['arr_flights'],
+            'delayed': row['arr_del15'],
+            'delay_pct': row['arr_del15'] / row['arr_flights'] * 100,
+            'cancelled_pct': row['arr_cancelled'] / row['arr_flights'] * 100,
+            'diverted_pct': row['arr_diverted'] / row['arr_flights'] * 100,
+            'delay_minutes': row['arr_delay'] / row['arr_del15'],
+        }
+        for season, row in yearly.iterrows()
+    ]
+
+# Share of each cause within delays, per season and over the whole selection
+def cause_mix_endpoint(store, params):
+    seasons = get_seasons(store, params)
+    yearly = store.aggregate(keep=('season',), season=seasons)
+    total = store.aggregate(season=seasons).to_frame('total').T
+
+    def as_causes(row):
+        return {cause.key: row[cause.count_col] for cause in DELAY_CAUSES}
+
+    return {
+        'causes': {cause.key: cause.label for cause in DELAY_CAUSES},
+        'total': as_causes(cause_mix(total).iloc[0]),
+        'seasons': [
+            {'season': season, **as_causes(row)}
+            for season, row in cause_mix(yearly).iterrows()
+        ],
+    }
+
+def rankings_endpoint(store, params):
+    entity = get_param(params, 'entity', 'carrier')
+    if entity not in ('carrier', 'state', 'airport'):
+        raise BadRequest("'entity' must be carrier, state or airport")
+    metric = get_param(params, 'metric', 'delay_pct')
+    if metric not in METRICS_BY_KEY:
+        raise BadRequest(f"'metric' must be one of: {', '.join(m.key for m in RANKING_METRICS)}")
+    order = get_param(params, 'order', 'worst')
+    if order not in ('worst', 'best'):
+        raise BadRequest("'order' must be worst or best")
+    state = get_param(params, 'state')
+    if state and entity != 'carrier':
+        raise BadRequest("'state' only filters carrier rankings")
+
+    ranked = rank_entities(
+        store,
+        entity,
+        metric,
+        get_seasons(store, params),
+        k=get_int_param(params, 'k', 10),
+        largest=order == 'worst',
+        min_flights=get_int_param(params, 'min_flights', 0),
+        state=state,
+    )
+    return [{entity: label, **row} for label, row in ranked.to_dict('index').items()]
+
+# Sums over any month window, e.g. ?start=2019-08&end=2020-03[&by=carrier]
+def window_endpoint(store, params):
+    start = get_param(params, 'start', store.months[0])
+    end = get_param(params, 'end', store.months[-1])
+    by = get_param(params, 'by')
+    if by not in (None, 'carrier', 'state'):
+        raise BadRequest("'by' must be carrier or state")
+    try:
+        frame = window_frame(store, [(f"{start} – {end}", start, end)], by=by)
+    except ValueError:
+        raise BadRequest("'start' and 'end' must be months like 2019-08")
+    frame = frame.reset_index().drop(columns='window')
+    return frame.to_dict('records')
+
+# Type-ahead lookup, e.g. ?q=expressjet or ?q=city4&kind=airport
+def search_endpoint(store, params):
+    kind = get_param(params, 'kind')
+    if kind not in (None, 'carrier', 'airport'):
+        raise BadRequest("'kind' must be carrier or airport")
+    entries = get_search_index(store).search(get_param(params, 'q', ''), kind, limit=get_int_param(params, 'limit', 10))
+    return [{'kind': entry.kind, 'key': entry.key, 'label': entry.label} for entry in entries]
+
+def info_endpoint(store, params):
+    return {
+        'dataset_version': store.dataset_hash,
+        'seasons': store.seasons,
+        'months': [store.months[0], store.months[-1]],
+        'metrics': {metric.key: metric.label for metric in RANKING_METRICS},
+    }
+
+ENDPOINTS = {
+    '/': info_endpoint,
+    '/seasons': seasons_endpoint,
+    '/cause-mix': cause_mix_endpoint,
+    '/rankings': rankings_endpoint,
+    '/window': window_endpoint,
+    '/search': search_endpoint,
+}
+
+
+# The watcher swaps in a new store when the dataset changes; each request answers from
+# the store current when it arrived, and its ETag carries that store's version
+class AggregationServer:
+    def __init__(self, watcher, cache_size=RESPONSE_CACHE_SIZE):
+        self.watcher = watcher
+        self.cache_size = cache_size
+        self.responses = OrderedDict()
+        self.version = watcher.store.dataset_hash
+
+    # Same request on the same dataset version -> same ETag, computed without touching the data
+    def get_etag(self, store, path, params):
+        canonical = json.dumps([path, sorted(params.items())])
+        digest = hashlib.sha1(f"{store.dataset_hash}:{canonical}".encode('utf-8')).hexdigest()
+        return f'"{digest[:20]}"'
+
+    # (etag, body), or (etag, None) when the client already has this version: a matching
+    # If-None-Match is answered from the ETag alone, without running the endpoint
+    async def get_response(self, path, params, if_none_match=''):
+        store = self.watcher.store
+        # Bodies of the previous version can never match again once the dataset is swapped
+        if store.dataset_hash != self.version:
+            self.responses.clear()
+            self.version = store.dataset_hash
+
+        etag = self.get_etag(store, path, params)
+        if etag in if_none_match:
+            return etag, None
+        if etag in self.responses:
+            self.responses.move_to_end(etag)
+            return etag, self.responses[etag]
+
+        # The numpy work runs in a thread so slow queries don't stall other connections
+        result = await asyncio.get_running_loop().run_in_executor(None, ENDPOINTS[path], store, params)
+        body = json.dumps(clean(result)).encode('utf-8')
+
+        self.responses[etag] = body
+        while len(self.responses) > self.cache_size:
+            self.responses.popitem(last=False)
+        return etag, body
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').strip()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            method, target, _ = (request_line.split(' ') + ['', '', ''])[:3]
+            url = urlsplit(target)
+            path = url.path.rstrip('/') or '/'
+
+            if method not in ('GET', 'HEAD'):
+                status, body, extra = 405, {'error': 'only GET is supported'}, {'Allow': 'GET, HEAD'}
+            elif path not in ENDPOINTS:
+                status, body, extra = 404, {'error': f"unknown endpoint, try one of: {', '.join(ENDPOINTS)}"}, {}
+            else:
+                params = parse_qs(url.query)
+                try:
+                    etag, body = await self.get_response(path, params, headers.get('if-none-match', ''))
+                except BadRequest as e:
+                    status, body, extra = 400, {'error': str(e)}, {}
+                except Exception:
+                    logger.exception("%s failed", target)
+                    status, body, extra = 500, {'error': 'internal error'}, {}
+                else:
+                    extra = {'ETag': etag, 'Cache-Control': f'public, max-age={MAX_AGE}'}
+                    status = 200 if body is not None else 304
+                    body = body if body is not None else b''
+
+            if isinstance(body, dict):
+                body = json.dumps(body).encode('utf-8')
+            await self.respond(writer, status, body, extra, send_body=method != 'HEAD')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, body, extra, send_body=True):
+        reasons = {
+            200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error',
+        }
+        lines = [f"HTTP/1.1 {status} {reasons[status]}", 'Connection: close']
+        if status != 304:
+            lines += ['Content-Type: application/json', f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if send_body:
+            writer.write(body)
+        await writer.drain()
+
+
+async def serve(dataset_path, host, port):
+    server = AggregationServer(DatasetWatcher(dataset_path))
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving {dataset_path} ({server.watcher.store.dataset_hash[:12]}) on http://{host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve dashboard aggregates as JSON.')
+    parser.add_argument('--dataset', default=DATASET_CSV, help='processed csv or its partition folder')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        asyncio.run(serve(resolve_dataset_path(args.dataset), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
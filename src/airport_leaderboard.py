@@ -0,0 +1,86 @@
+import streamlit as st
+
+from src.rankings import RANKING_METRICS, METRICS_BY_KEY, rank_entities
+from src.startup import lazy_import
+from src.utils import format_with_dots
+
+px = lazy_import('plotly.express')
+
+LEADERBOARD_ENTITIES = {'Airports': 'airport', 'Carriers': 'carrier', 'States': 'state'}
+
+## Leaderboard: top/bottom K entities for any metric, served from the ranking index
+def airport_leaderboard(store, selected_years):
+    year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
+
+    col1, col2, col3 = st.columns([1, 1, 1], gap="large")
+    with col1:
+        entity_label = st.radio("Rank", list(LEADERBOARD_ENTITIES), horizontal=True)
+        entity = LEADERBOARD_ENTITIES[entity_label]
+    with col2:
+        metric = st.selectbox(
+            "Metric",
+            [metric.key for metric in RANKING_METRICS],
+            format_func=lambda key: METRICS_BY_KEY[key].label,
+        )
+    with col3:
+        worst = st.radio("Order", ["Worst", "Best"], horizontal=True) == "Worst"
+
+    col4, col5 = st.columns([1, 1], gap="large")
+    with col4:
+        k = st.slider("How many", min_value=5, max_value=30, value=10, step=5)
+    with col5:
+        # Small airports swing wildly from a handful of flights, so they can be left out
+        min_flights = st.number_input("Minimum flights", min_value=0, value=1000, step=500)
+
+    ranked = rank_entities(store, entity, metric, selected_years, k=k, largest=worst, min_flights=min_flights)
+    if ranked.empty:
+        st.warning("No data available for the selected filters.")
+        return
+
+    spec = METRICS_BY_KEY[metric]
+    title = f"Top {len(ranked)} {'Worst' if worst else 'Best'} {entity_label} by {spec.label}"
+    st.markdown(f"<h2 style='font-size: 24px;'>{title}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+
+    df_plot = ranked.reset_index().rename(columns={entity: 'Entity'})
+    if 'label' not in df_plot.columns:
+        df_plot['label'] = df_plot['Entity']
+    df_plot['hover_count'] = df_plot[spec.numerator].apply(format_with_dots)
+    count_label = 'Count' if spec.unit == '%' else 'Delay Minutes'
+    df_plot['hover_flights'] = df_plot['arr_flights'].apply(format_with_dots)
+
+    fig = px.bar(
+        df_plot,
+        x=spec.key,
+        y='label',
+        orientation='h',
+        color=spec.key,
+        color_continuous_scale='Reds' if worst else 'Greens',
+        custom_data=['hover_count', 'hover_flights'],
+        template='plotly_white',
+        height=max(350, 30 * len(df_plot)),
+    )
+    fig.update_traces(
+        marker_line_color='darkgray',
+        marker_line_width=1,
+        hovertemplate=(
+            '<b>%{y}</b><br>'
+            f'{spec.label}: <b>%{{x:.2f}}{spec.unit}</b><br>'
+            f'{count_label}: <b>%{{customdata[0]}}</b><br>'
+            'Total Flights: <b>%{customdata[1]}</b><extra></extra>'
+        ),
+    )
+    fig.update_layout(
+        xaxis_title=spec.label,
+        yaxis=dict(title='', autorange='reversed'),
+        font=dict(family="Segoe UI", size=14),
+        plot_bgcolor='rgba(0,0,0,0)',
+        margin=dict(t=0, b=40, l=40, r=20),
+        coloraxis_showscale=False,
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    table = df_plot[['rank', 'label', spec.key, 'hover_count', 'hover_flights']].rename(columns={
+        'rank': 'Rank', 'label': entity_label[:-1], spec.key: spec.label,
+        'hover_count': count_label, 'hover_flights': 'Total Flights',
+    })
+    st.dataframe(table.round(2), hide_index=True, use_container_width=True)
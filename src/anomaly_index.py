@@ -0,0 +1,271 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.delay_causes import CAUSE_COUNT_COLUMNS
+from src.fused_aggregation import fused_group_sums
+from src.month_windows import format_month, parse_month
+from src.partitions import get_dataset_files, list_partitions, read_dataset, resolve_dataset_path
+from src.utils import get_airline_year_months
+
+# Every carrier x airport pair is one monthly series. The index keeps their sums as a dense
+# (series x month x measure) array plus per-cell scores against the series' own trailing baseline:
+#   rate_z     how far the month's delay rate is from the previous BASELINE_MONTHS, in standard
+#              deviations (month-to-month spread plus the binomial noise of the month's flights)
+#   mix_shift  percentage points of delays that moved between causes versus the baseline mix
+# Baselines come from cumulative sums along the month axis, so all series are scored at once,
+# and a newly ingested month only needs the trailing window to be scored.
+INDEX_VERSION = 1
+ANOMALY_MEASURES = ['arr_flights', 'arr_del15'] + CAUSE_COUNT_COLUMNS
+SCORES = ['rate_z', 'mix_shift', 'baseline_rate', 'baseline_std']
+
+BASELINE_MONTHS = 12
+MIN_BASELINE_MONTHS = 6
+# Months with fewer flights (or delays, for the cause mix) are neither scored nor part of a baseline
+MIN_FLIGHTS = 30
+MIN_DELAYS = 20
+
+FLIGHTS, DELAYED = 0, 1
+CAUSES = slice(2, 2 + len(CAUSE_COUNT_COLUMNS))
+
+
+def get_index_path(dataset_path):
+    return os.path.splitext(dataset_path)[0] + '.anomalies.npz'
+
+def get_file_fingerprints(dataset_path):
+    fingerprints = {}
+    for path in get_dataset_files(dataset_path):
+        stat = os.stat(path)
+        fingerprints[os.path.relpath(path, dataset_path) if os.path.isdir(dataset_path) else path] = (stat.st_size, stat.st_mtime_ns)
+    return fingerprints
+
+
+# Sums per (carrier, airport) and month for a set of rows, as series keys, month numbers and dense sums
+def build_series_sums(df):
+    df = df.dropna(subset=['carrier', 'airport']).copy()
+    df['month_number'] = df['year'] * 12 + df['month'] - 1
+    labels, sums = fused_group_sums(df, ['carrier', 'airport', 'month_number'], ANOMALY_MEASURES)
+    series = pd.MultiIndex.from_product([labels[0], labels[1]], names=['carrier', 'airport'])
+    sums = sums.reshape(len(series), len(labels[2]), len(ANOMALY_MEASURES))
+
+    # Pairs without any rows are dropped
+    active = np.abs(sums).sum(axis=(1, 2)) > 0
+    return series[active], np.array(labels[2], dtype=np.int64), sums[active]
+
+# Place sums for some months onto a contiguous month axis starting at `first_month`
+def to_month_axis(month_numbers, sums, first_month, n_months):
+    dense = np.zeros((sums.shape[0], n_months, sums.shape[2]))
+    dense[:, month_numbers - first_month] = sums
+    return dense
+
+
+# Scores for months [start, n_months) of every series; earlier months only feed the baselines
+def compute_scores(sums, start=0):
+    lo = max(start - BASELINE_MONTHS, 0)
+    window = sums[:, lo:]
+    flights, delayed, causes = window[:, :, FLIGHTS], window[:, :, DELAYED], window[:, :, CAUSES]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid = flights >= MIN_FLIGHTS
+        rate = np.where(valid, delayed / flights, 0.0)
+        cause_total = causes.sum(axis=2)
+        mix_valid = valid & (cause_total >= MIN_DELAYS)
+        mix = np.where(mix_valid[:, :, None], causes / cause_total[:, :, None], 0.0)
+
+        # Trailing sums over the previous BASELINE_MONTHS months (current month excluded),
+        # along the month axis of (series x month [x cause]) arrays
+        def trailing(values):
+            cumulative = np.concatenate([np.zeros_like(values[:, :1]), np.cumsum(values, axis=1)], axis=1)
+            ends = np.arange(values.shape[1])
+            starts = np.maximum(ends - BASELINE_MONTHS, 0)
+            return cumulative[:, ends] - cumulative[:, starts]
+
+        count = trailing(valid.astype(np.float64))
+        mean = trailing(rate) / count
+        variance = np.maximum(trailing(rate ** 2) / count - mean ** 2, 0)
+        noise = mean * (1 - mean) / flights
+        std = np.sqrt(variance + noise)
+        rate_z = np.where(valid & (count >= MIN_BASELINE_MONTHS), (rate - mean) / std, np.nan)
+
+        mix_count = trailing(mix_valid.astype(np.float64))
+        baseline_causes = trailing(np.where(mix_valid[:, :, None], causes, 0.0))
+        baseline_mix = baseline_causes / baseline_causes.sum(axis=2, keepdims=True)
+        mix_shift = np.abs(mix - baseline_mix).sum(axis=2) * 50
+        mix_shift = np.where(mix_valid & (mix_count >= MIN_BASELINE_MONTHS), mix_shift, np.nan)
+
+    scores = np.stack([rate_z, mix_shift, np.where(count > 0, mean, np.nan), np.where(count > 0, std, np.nan)], axis=2)
+    return scores[:, start - lo:]
+
+
+# Latest carrier_name per carrier code, for display
+def get_carrier_names(df):
+    latest = df.dropna(subset=['carrier']).sort_values(['year', 'month']).drop_duplicates('carrier', keep='last')
+    return dict(zip(latest['carrier'], latest['carrier_name']))
+
+def build_index(dataset_path):
+    df = read_dataset(dataset_path)
+    series, month_numbers, sums = build_series_sums(df)
+    first_month = int(month_numbers.min())
+    sums = to_month_axis(month_numbers, sums, first_month, int(month_numbers.max()) - first_month + 1)
+    return {
+        'series': series,
+        'first_month': first_month,
+        'sums': sums,
+        'scores': compute_scores(sums),
+        'carrier_names': get_carrier_names(df),
+        'files': get_file_fingerprints(dataset_path),
+    }
+
+# Append rows of months after the last indexed month: new series get zero history,
+# and only the new months are scored (their baselines reach back BASELINE_MONTHS)
+def append_months(index, df):
+    series, month_numbers, sums = build_series_sums(df)
+    old_months = index['sums'].shape[1]
+    if month_numbers.min() < index['first_month'] + old_months:
+        raise ValueError("appended rows must be for months after the indexed ones")
+
+    all_series = index['series'].append(series.difference(index['series']))
+    n_months = int(month_numbers.max()) - index['first_month'] + 1
+
+    merged = np.zeros((len(all_series), n_months, len(ANOMALY_MEASURES)))
+    merged[:len(index['series']), :old_months] = index['sums']
+    merged[all_series.get_indexer(series)] += to_month_axis(month_numbers, sums, index['first_month'], n_months)
+
+    scores = np.full((len(all_series), n_months, len(SCORES)), np.nan)
+    scores[:len(index['series']), :old_months] = index['scores']
+    scores[:, old_months:] = compute_scores(merged, start=old_months)
+    carrier_names = {**index['carrier_names'], **get_carrier_names(df)}
+    return {**index, 'series': all_series, 'sums': merged, 'scores': scores, 'carrier_names': carrier_names}
+
+
+def save_index(path, index):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            version=INDEX_VERSION,
+            carriers=np.array(index['series'].get_level_values('carrier'), dtype=str),
+            airports=np.array(index['series'].get_level_values('airport'), dtype=str),
+            first_month=index['first_month'],
+            sums=index['sums'],
+            scores=index['scores'],
+            carrier_codes=np.array(list(index['carrier_names']), dtype=str),
+            carrier_names=np.array(list(index['carrier_names'].values()), dtype=str),
+            file_names=np.array(list(index['files']), dtype=str),
+            file_stats=np.array(list(index['files'].values()), dtype=np.int64).reshape(-1, 2),
+        )
+    os.replace(tmp_path, path)
+
+def load_index(path):
+    with np.load(path) as data:
+        if int(data['version']) != INDEX_VERSION:
+            return None
+        return {
+            'series': pd.MultiIndex.from_arrays([data['carriers'].astype(object), data['airports'].astype(object)], names=['carrier', 'airport']),
+            'first_month': int(data['first_month']),
+            'sums': data['sums'],
+            'scores': data['scores'],
+            'carrier_names': dict(zip(data['carrier_codes'].tolist(), data['carrier_names'].tolist())),
+            'files': {name: tuple(stat) for name, stat in zip(data['file_names'].tolist(), data['file_stats'].tolist())},
+        }
+
+# Bring the index on disk up to date with the dataset. Partitions of new months that come after
+# everything indexed are appended incrementally; any other change rebuilds the whole index.
+def update_index(dataset_path):
+    path = get_index_path(dataset_path)
+    files = get_file_fingerprints(dataset_path)
+    index = load_index(path) if os.path.exists(path) else None
+
+    if index is not None and index['files'] == files:
+        return index
+
+    if index is not None and os.path.isdir(dataset_path):
+        unchanged = all(files.get(name) == stat for name, stat in index['files'].items())
+        last_month = index['first_month'] + index['sums'].shape[1] - 1
+        added = [
+            (year, month, partition_path) for year, month, partition_path in list_partitions(dataset_path)
+            if os.path.relpath(partition_path, dataset_path) not in index['files']
+        ]
+        if unchanged and added and all(parse_month(f"{year}-{month}") > last_month for year, month, _ in added):
+            df = pd.concat([pd.read_csv(partition_path) for _, _, partition_path in added], ignore_index=True)
+            index = append_months(index, df)
+            index['files'] = files
+            save_index(path, index)
+            return index
+
+    index = build_index(dataset_path)
+    save_index(path, index)
+    return index
+
+
+# Flagged cells of the selected airline years, strongest first, as a flat frame
+def find_anomalies(index, selected_years, signal='rate_z', k=25, threshold=3.0, direction='both'):
+    first_month, n_months = index['first_month'], index['sums'].shape[1]
+    wanted = sorted({parse_month(f"{y}-{m}") - first_month for season in selected_years for y, m in get_airline_year_months(season)})
+    months = np.array([m for m in wanted if 0 <= m < n_months], dtype=np.int64)
+    if len(months) == 0:
+        return pd.DataFrame()
+
+    scores = index['scores'][:, months, SCORES.index(signal)]
+    if signal == 'rate_z' and direction == 'worse':
+        strength = scores
+    elif signal == 'rate_z' and direction == 'better':
+        strength = -scores
+    else:
+        strength = np.abs(scores)
+    strength = np.where(strength >= threshold, strength, np.nan).ravel()
+
+    # Partial sort of the flagged cells only
+    flagged = np.flatnonzero(~np.isnan(strength))
+    k = min(k, len(flagged))
+    if k == 0:
+        return pd.DataFrame()
+    top = flagged[np.argpartition(-strength[flagged], k - 1)[:k]]
+    top = top[np.argsort(-strength[top], kind='stable')]
+    series_pos, month_pos = np.divmod(top, len(months))
+    month_pos = months[month_pos]
+
+    sums = index['sums'][series_pos, month_pos]
+    cell_scores = index['scores'][series_pos, month_pos]
+    result = pd.DataFrame({
+        'carrier': index['series'].get_level_values('carrier')[series_pos],
+        'airport': index['series'].get_level_values('airport')[series_pos],
+        'month': [format_month(first_month + m) for m in month_pos],
+        'arr_flights': sums[:, FLIGHTS],
+        'delay_pct': sums[:, DELAYED] / sums[:, FLIGHTS] * 100,
+        'baseline_pct': cell_scores[:, SCORES.index('baseline_rate')] * 100,
+        'rate_z': cell_scores[:, SCORES.index('rate_z')],
+        'mix_shift': cell_scores[:, SCORES.index('mix_shift')],
+    })
+    result['series_pos'] = series_pos
+    result['month_pos'] = month_pos
+    return result
+
+# Monthly delay % of one series with its baseline band, for the detail chart
+def series_history(index, series_pos):
+    sums = index['sums'][series_pos]
+    scores = index['scores'][series_pos]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delay_pct = np.where(sums[:, FLIGHTS] > 0, sums[:, DELAYED] / sums[:, FLIGHTS] * 100, np.nan)
+    baseline = scores[:, SCORES.index('baseline_rate')] * 100
+    spread = scores[:, SCORES.index('baseline_std')] * 100
+    return pd.DataFrame({
+        'month': [format_month(index['first_month'] + m) for m in range(sums.shape[0])],
+        'arr_flights': sums[:, FLIGHTS],
+        'delay_pct': delay_pct,
+        'baseline_pct': baseline,
+        'lower': baseline - 2 * spread,
+        'upper': baseline + 2 * spread,
+    })
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    dataset_file = sys.argv[1] if len(sys.argv) > 1 else resolve_dataset_path(os.path.join('src', 'dataset', 'Airline_Delay_Cause_Data_Processing.csv'))
+    started = time.perf_counter()
+    result = update_index(dataset_file)
+    print(f"{get_index_path(dataset_file)}: {len(result['series'])} series x {result['sums'].shape[1]} months "
+          f"({time.perf_counter() - started:.2f}s)")
@@ -1,47 +1,124 @@
 import streamlit as st
-import plotly.express as px
 import pandas as pd
-from src.utils import get_airline_year, format_with_dots
+from src.cross_filter import CARRIER_FILTER_KEY, apply_selection, carrier_from_bar_event
+from src.disk_cache import disk_cached
+from src.rankings import METRICS_BY_KEY, entity_metric, extremes
+from src.startup import lazy_import
+from src.state_utils import state_abbrev_to_name
+from src.utils import format_with_dots
+
+px = lazy_import('plotly.express')
+
+# Wording and color scale for each rate the carrier and state views can show
+RATE_VIEWS = {
+    'delay_pct': ('Delay Percentage', 'Total Delays', 'Percentage of Flight Delays (%)', 'Blues'),
+    'cancelled_pct': ('Cancellation Percentage', 'Total Cancellations', 'Percentage of Flights Cancelled (%)', 'Oranges'),
+    'diverted_pct': ('Diversion Percentage', 'Total Diversions', 'Percentage of Flights Diverted (%)', 'Purples'),
+}
+DISRUPTION_METRICS = {'Cancellations': 'cancelled_pct', 'Diversions': 'diverted_pct'}
+
+def compute_carrier_avg_delay(carrier_group, metric='delay_pct'):
+    numerator = METRICS_BY_KEY[metric].numerator
+    avg_delay_percent = (carrier_group[numerator] / carrier_group['arr_flights']) * 100
+    return avg_delay_percent.sort_values()
+
+# Figure spec for the carrier bar chart, cached on disk so restarted processes skip plotly express
+@disk_cached('carrier_delay_figure')
+def build_carrier_delay_figure(store, selected_years, state=None, metric='delay_pct'):
+    rate_label, count_label, axis_label, colorscale = RATE_VIEWS[metric]
+    carrier_group = store.aggregate(keep=('carrier',), season=selected_years, state=state)
+    selected_data = compute_carrier_avg_delay(carrier_group, metric).sort_values(ascending=False)
 
-@st.cache_data(show_spinner=False)
-def compute_carrier_avg_delay(df):
-    carrier_group = df.groupby('carrier_name').agg(
-        total_del15=('arr_del15', 'sum'),
-        total_flights=('arr_flights', 'sum')
+    df_plot = selected_data.reset_index()
+    df_plot.columns = ['Carrier', 'AvgDelayPercent']
+    
+    # Calculate total delay and total flight for each carrier
+    carrier_stats = carrier_group.rename(columns={METRICS_BY_KEY[metric].numerator: 'total_delay', 'arr_flights': 'total_flight'})
+    carrier_stats = carrier_stats.loc[selected_data.index]
+    # Format total_delay and total_flight with dots
+    df_plot['TotalDelay'] = carrier_stats['total_delay'].apply(format_with_dots).values
+    df_plot['TotalFlight'] = carrier_stats['total_flight'].apply(format_with_dots).values
+
+    fig = px.bar(
+        df_plot,
+        x='Carrier',
+        y='AvgDelayPercent',
+        labels={'AvgDelayPercent': axis_label},
+        color='AvgDelayPercent',
+        color_continuous_scale=colorscale,
+        template='plotly_white',
+        height=450
+    )
+
+    fig.update_traces(
+        marker_line_color='darkgray',
+        marker_line_width=1.5,
+        hovertemplate=f'<b>%{{x}}</b><br>{rate_label}: <b>%{{y:.2f}}%</b><br>{count_label}: <b>%{{customdata[0]}}</b><br>Total Flights: <b>%{{customdata[1]}}</b><extra></extra>',
+        customdata=df_plot[['TotalDelay', 'TotalFlight']].values
     )
-    avg_delay_percent = (carrier_group['total_del15'] / carrier_group['total_flights']) * 100
-    return avg_delay_percent.sort_values()
 
-@st.cache_data(show_spinner=False)
-def filter_data_by_year(df, selected_years):
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    return df[df['airline_year'].isin(selected_years)]
+    fig.update_layout(
+        yaxis_range=[0, df_plot['AvgDelayPercent'].max() * 1.2],
+        font=dict(family="Segoe UI", size=14),
+        plot_bgcolor='rgba(0,0,0,0)',
+        margin=dict(t=0, b=40, l=40, r=20),
+        coloraxis_showscale=False  # Hide the color bar
+    )
 
-@st.cache_data(show_spinner=False)
-def load_and_prepare_data(path):
-    df = pd.read_csv(path)
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    return df
+    return fig.to_dict()
+
+# Season trend of a rate for all flights and a few named entities.
+# `entity_season` holds season x entity sums of every measure, `total_season` the season sums.
+def build_rate_trend_figure(entity_season, total_season, entities, metric):
+    rate_label, _, axis_label, _ = RATE_VIEWS[metric]
+    numerator = METRICS_BY_KEY[metric].numerator
+
+    lines = [('All flights', total_season)] + [
+        (entity, entity_season.xs(entity, level=1)) for entity in entities
+    ]
+    trend = pd.concat([
+        pd.DataFrame({
+            'airline_year': sums.index,
+            'rate': sums[numerator] / sums['arr_flights'] * 100,
+            'line': name,
+        })
+        for name, sums in lines
+    ], ignore_index=True)
+
+    fig = px.line(
+        trend,
+        x='airline_year',
+        y='rate',
+        color='line',
+        markers=True,
+        color_discrete_sequence=['#F5F9FF', '#d62728', '#2ca02c'],
+        labels={'rate': axis_label, 'airline_year': 'Year', 'line': ''},
+        height=350,
+    )
+    fig.update_traces(hovertemplate=f'Year: <b>%{{x}}</b><br>{rate_label}: <b>%{{y:.2f}}%</b>')
+    fig.update_layout(
+        margin=dict(t=20, b=40, l=40, r=20),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    return fig
 
-def average_carrier_delay(df, selected_years):
-    df = filter_data_by_year(df, selected_years)
+# `state` is the cross-filter from the State page map; `carrier_season` is already restricted to it
+def average_carrier_delay(store, carrier_season, selected_years, state=None):
     year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
-    
-    # Check if data is available for the selected years
-    carrier_avg = compute_carrier_avg_delay(filter_data_by_year(df, selected_years))
 
-    # Get highest and lowest
-    highest_carrier = carrier_avg.idxmax()
-    highest_value = carrier_avg.max()
-    lowest_carrier = carrier_avg.idxmin()
-    lowest_value = carrier_avg.min()
+    if carrier_season.empty:
+        st.warning("No data available for the selected filters.")
+        return
 
-    st.write("")
+    # Delay percentage per carrier for the selected years, from the precomputed season sums
+    carrier_avg_delay = entity_metric(store, 'carrier', 'delay_pct', selected_years, state=state)
 
-    # Compute and cache average delay per carrier
-    carrier_avg_delay = compute_carrier_avg_delay(df)
+    # Get highest and lowest
+    (highest_carrier, highest_value), (lowest_carrier, lowest_value) = extremes(
+        store, 'carrier', 'delay_pct', selected_years, state=state
+    )
 
-    selected_data = carrier_avg_delay.sort_values(ascending=False)
+    st.write("")
 
     # Compute overall average
     overall_avg = carrier_avg_delay.mean()
@@ -82,46 +159,74 @@ def average_carrier_delay(df, selected_years):
             unsafe_allow_html=True
         )
 
-    df_plot = selected_data.reset_index()
-    df_plot.columns = ['Carrier', 'AvgDelayPercent']
-    
-    # Calculate total delay and total flight for each carrier
-    carrier_stats = df.groupby('carrier_name').agg(
-        total_delay=('arr_del15', 'sum'),
-        total_flight=('arr_flights', 'sum')
+    state_label = f" in {state_abbrev_to_name.get(state, state)}" if state else ""
+    st.markdown(f"<h2 style='font-size: 24px;'>Flight Delays Percentage of All Carriers{state_label}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+
+    # Plot (click a carrier to color the State page map by that carrier)
+    event = st.plotly_chart(
+        build_carrier_delay_figure(store, selected_years, state),
+        use_container_width=True,
+        on_select='rerun',
+        selection_mode='points',
+        key='carrier_delay_bar',
     )
-    carrier_stats = carrier_stats.loc[selected_data.index]
-    # Format total_delay and total_flight with dots
-    df_plot['TotalDelay'] = carrier_stats['total_delay'].apply(format_with_dots).values
-    df_plot['TotalFlight'] = carrier_stats['total_flight'].apply(format_with_dots).values
+    apply_selection(CARRIER_FILTER_KEY, carrier_from_bar_event(event))
 
-    st.markdown(f"<h2 style='font-size: 24px;'>Flight Delays Percentage of All Carriers<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+## Cancellations and diversions per carrier, from the same season sums as the delay view
+def carrier_disruptions(store, carrier_season, selected_years, state=None):
+    year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
+    if carrier_season.empty:
+        return
 
-    # Plot
-    fig = px.bar(
-        df_plot,
-        x='Carrier',
-        y='AvgDelayPercent',
-        labels={'AvgDelayPercent': 'Percentage of Flight Delays (%)'},
-        color='AvgDelayPercent',
-        color_continuous_scale='Blues',
-        template='plotly_white',
-        height=450
-    )
+    measure = st.radio("Disruption", list(DISRUPTION_METRICS), horizontal=True, key='carrier_disruption_metric')
+    metric = DISRUPTION_METRICS[measure]
+    rate_label = RATE_VIEWS[metric][0]
 
-    fig.update_traces(
-        marker_line_color='darkgray',
-        marker_line_width=1.5,
-        hovertemplate='<b>%{x}</b><br>Delay Percentage: <b>%{y:.2f}%</b><br>Total Delays: <b>%{customdata[0]}</b><br>Total Flights: <b>%{customdata[1]}</b><extra></extra>',
-        customdata=df_plot[['TotalDelay', 'TotalFlight']].values
+    (highest_carrier, highest_value), (lowest_carrier, lowest_value) = extremes(
+        store, 'carrier', metric, selected_years, state=state
     )
+    total_season = carrier_season.groupby(level='season').sum()
+    total = total_season.sum()
+    overall = total[METRICS_BY_KEY[metric].numerator] / total['arr_flights'] * 100
 
-    fig.update_layout(
-        yaxis_range=[0, df_plot['AvgDelayPercent'].max() * 1.2],
-        font=dict(family="Segoe UI", size=14),
-        plot_bgcolor='rgba(0,0,0,0)',
-        margin=dict(t=0, b=40, l=40, r=20),
-        coloraxis_showscale=False  # Hide the color bar
-    )
+    col1, col2, col3 = st.columns([1, 1, 1], gap="large")
+    with col1:
+        st.markdown(
+            f"""
+            <div style='padding: 0 24px 8px 0; margin-bottom:8px; display:flex; flex-direction:column; justify-content:center; align-items:flex-start;'>
+                <div style='font-size:15px; color:#fff; margin-bottom:2px;'>{rate_label} of All Carriers</div>
+                <div style='font-size:2.2em; font-weight:bold; color:#fff;'>{overall:.2f}%</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+    with col2:
+        st.markdown(
+            f"""
+            <div style='padding: 0 24px 8px 0; margin-bottom:8px; display:flex; flex-direction:column; justify-content:center; align-items:flex-start;'>
+                <div style='font-size:15px; color:#fff; margin-bottom:2px;'>Carrier with the Highest {rate_label}</div>
+                <div style='font-size:1.5em; font-weight:bold; color:#d62728;'>{highest_carrier}</div>
+                <div style='font-size:1.2em; color:#d62728;'>{highest_value:.2f}%</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+    with col3:
+        st.markdown(
+            f"""
+            <div style='padding: 0 24px 8px 0; margin-bottom:8px; display:flex; flex-direction:column; justify-content:center; align-items:flex-start;'>
+                <div style='font-size:15px; color:#fff; margin-bottom:2px;'>Carrier with the Lowest {rate_label}</div>
+                <div style='font-size:1.5em; font-weight:bold; color:#2ca02c;'>{lowest_carrier}</div>
+                <div style='font-size:1.2em; color:#2ca02c;'>{lowest_value:.2f}%</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+
+    state_label = f" in {state_abbrev_to_name.get(state, state)}" if state else ""
+    st.markdown(f"<h2 style='font-size: 24px;'>{measure} Percentage of All Carriers{state_label}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+    st.plotly_chart(build_carrier_delay_figure(store, selected_years, state, metric), use_container_width=True)
 
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    st.markdown(f"<h2 style='font-size: 24px;'>{measure} Trend Across Years{state_label}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+    entities = list(dict.fromkeys([highest_carrier, lowest_carrier]))
+    st.plotly_chart(build_rate_trend_figure(carrier_season, total_season, entities, metric), use_container_width=True)
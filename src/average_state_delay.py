@@ -1,44 +1,100 @@
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
-from src.utils import get_airline_year
+from plotly.colors import get_colorscale
+from src.average_carrier_delay import DISRUPTION_METRICS, RATE_VIEWS, build_carrier_delay_figure, build_rate_trend_figure
+from src.cross_filter import STATE_FILTER_KEY, apply_selection, get_state_filter, state_from_map_event
+from src.memory_cache import memory_cached
+from src.rankings import entity_metric, top_k
 from src.state_utils import state_abbrev_to_name, state_coords
 
-@st.cache_data(show_spinner=False)
-def compute_state_avg_delay(df):
+# Flight-weighted delay percentage per state (optionally for one carrier), straight from the aggregate store
+def compute_state_delay(store, selected_years, carrier=None):
     return (
-        df.groupby('airport_state')['arr_del15_percentage']
-        .mean()
+        entity_metric(store, 'state', 'delay_pct', selected_years, carrier=carrier)
+        .rename('arr_del15_percentage')
+        .rename_axis('airport_state')
         .reset_index()
     )
 
-@st.cache_data(show_spinner=False)
-def filter_data_by_year(df, selected_years):
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    return df[df['airline_year'].isin(selected_years)]
+# The geo layout, the state label layer and the resolved color scale are the same on every rerun, so
+# they're built once (the last two in the shared memory cache, under its size budget); a rerun only
+# adds the z-values and hover names of the choropleth.
+# The figure is sent as a plain dict (Streamlit validates it once), and uirevision keeps zoom and pan.
+STATE_MAP_LAYOUT = dict(
+    geo=dict(
+        scope='usa',
+        projection=dict(type='albers usa'),
+        showlakes=False,
+        lakecolor='rgba(0,0,0,0)',
+        bgcolor='rgba(0,0,0,0)',
+        showframe=False,
+        showcoastlines=False,
+    ),
+    height=600,
+    margin=dict(l=0, r=0, t=30, b=0),
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    uirevision='state_map',
+)
 
-@st.cache_data(show_spinner=False)
-def load_and_prepare_data(path):
-    df = pd.read_csv(path)
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    return df
+# State abbreviations drawn on top of the map, for the states that have data
+@memory_cached('state_label_layer')
+def get_state_label_layer(states):
+    labelled = [abbr for abbr in states if abbr in state_coords]
+    return dict(
+        type='scattergeo',
+        locationmode='USA-states',
+        lon=[state_coords[abbr][1] for abbr in labelled],
+        lat=[state_coords[abbr][0] for abbr in labelled],
+        text=labelled,
+        mode='text',
+        textfont=dict(color='black', size=10),
+        showlegend=False,
+        hoverinfo='skip',
+    )
+
+# Everything about the choropleth except its values
+@memory_cached('choropleth_style')
+def get_choropleth_style(colorscale, colorbar_title, hover_label):
+    return dict(
+        type='choropleth',
+        locationmode='USA-states',
+        colorscale=get_colorscale(colorscale),
+        colorbar=dict(title=dict(text=colorbar_title)),
+        hovertemplate=f'<b>%{{customdata}} (%{{location}})</b><br>{hover_label}: <b>%{{z:.2f}}%</b><extra></extra>',
+    )
+
+# Choropleth of one value per state, with the state abbreviations on top
+def build_state_map_figure(state_values, value_col, colorscale, colorbar_title, hover_label):
+    states = tuple(state_values['airport_state'])
+    choropleth = dict(
+        get_choropleth_style(colorscale, colorbar_title, hover_label),
+        locations=list(states),
+        z=state_values[value_col].to_numpy(),
+        customdata=state_values['airport_state_full'].tolist(),
+    )
+    return dict(data=[choropleth, get_state_label_layer(states)], layout=STATE_MAP_LAYOUT)
 
-def average_state_delay(df, selected_years):
+# `carrier` is the cross-filter from the Carrier page ranking; the map is recolored for that carrier
+def average_state_delay(store, selected_years, carrier=None):
     year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
 
-    # Filter berdasarkan tahun
-    filtered_df = filter_data_by_year(df, selected_years)
-    
-    # Hitung rata-rata keterlambatan per state
-    state_delay = compute_state_avg_delay(filtered_df)
+    # Delayed flights over flights per state, so any year range rolls up from the season sums
+    state_delay = compute_state_delay(store, selected_years, carrier)
+
+    if state_delay.empty:
+        st.warning("No data available for the selected filters.")
+        return
 
     # Tambahkan nama lengkap negara bagian
     state_delay['airport_state_full'] = state_delay['airport_state'].map(state_abbrev_to_name)
 
-    # Overview metrics
-    highest_state_row = state_delay.loc[state_delay['arr_del15_percentage'].idxmax()]
-    lowest_state_row = state_delay.loc[state_delay['arr_del15_percentage'].idxmin()]
-    overall_avg = state_delay['arr_del15_percentage'].mean()
+    # Overview metrics (the overall figures are flight-weighted across all states)
+    by_state = state_delay.set_index('airport_state', drop=False)
+    highest_state_row = by_state.loc[top_k(by_state['arr_del15_percentage'], 1).index[0]]
+    lowest_state_row = by_state.loc[top_k(by_state['arr_del15_percentage'], 1, largest=False).index[0]]
+    totals = store.aggregate(season=selected_years, carrier=carrier)
+    overall_avg = totals['arr_del15'] / totals['arr_flights'] * 100
+    delay_minutes = totals['arr_delay'] / totals['arr_del15']
 
     # Custom styled metrics, no border, improved spacing, white text except red/green
     col1, col2, col3 = st.columns([1, 1, 1], gap="large")
@@ -49,6 +105,7 @@ def average_state_delay(df, selected_years):
             <div style='padding: 0 24px 8px 0; margin-bottom:8px; display:flex; flex-direction:column; justify-content:center; align-items:flex-start;'>
                 <div style='font-size:15px; color:#fff; margin-bottom:2px;'>Average Delay Percentage</div>
                 <div style='font-size:2.2em; font-weight:bold; color:#fff;'>{overall_avg:.2f}%</div>
+                <div style='font-size:14px; color:#aaa;'>{delay_minutes:.1f} minutes per delayed flight</div>
             </div>
             """,
             unsafe_allow_html=True
@@ -76,47 +133,63 @@ def average_state_delay(df, selected_years):
             unsafe_allow_html=True
         )
 
-    st.markdown(f"<h2 style='font-size: 24px;'>List of Average Flight Delays by States<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+    carrier_label = f" for {carrier}" if carrier else ""
+    st.markdown(f"<h2 style='font-size: 24px;'>List of Average Flight Delays by States{carrier_label}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
 
-    # Buat visualisasi choropleth
-    choropleth = go.Choropleth(
-        locations=state_delay['airport_state'],
-        z=state_delay['arr_del15_percentage'],
-        locationmode='USA-states',
-        colorscale='Blues',
-        colorbar_title='Average % of Arrival Delays',
-        customdata=state_delay[['airport_state_full', 'airport_state']],
-        hovertemplate='<b>%{customdata[0]} (%{customdata[1]})</b><br>Delay Percentage: <b>%{z:.2f}%</b><extra></extra>',
-    )
+    fig = build_state_map_figure(state_delay, 'arr_del15_percentage', 'Blues', 'Average % of Arrival Delays', 'Delay Percentage')
 
-    # Add state abbreviations as scattergeo
-    scatter_text = go.Scattergeo(
-        locationmode='USA-states',
-        lon=[state_coords[abbr][1] for abbr in state_delay['airport_state'] if abbr in state_coords],
-        lat=[state_coords[abbr][0] for abbr in state_delay['airport_state'] if abbr in state_coords],
-        text=[abbr for abbr in state_delay['airport_state'] if abbr in state_coords],
-        mode='text',
-        textfont=dict(color='black', size=10),
-        showlegend=False,
-        hoverinfo='skip'
+    # Click a state to filter the carrier rankings and cause breakdowns to it
+    event = st.plotly_chart(
+        fig,
+        use_container_width=True,
+        on_select='rerun',
+        selection_mode='points',
+        key='state_delay_map',
     )
+    apply_selection(STATE_FILTER_KEY, state_from_map_event(event, state_delay['airport_state']))
+
+    state = get_state_filter()
+    if state:
+        st.markdown(f"<h2 style='font-size: 24px;'>Flight Delays Percentage of All Carriers in {state_abbrev_to_name.get(state, state)}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+        st.plotly_chart(build_carrier_delay_figure(store, selected_years, state), use_container_width=True)
 
-    fig = go.Figure(data=[choropleth, scatter_text])
-
-    fig.update_layout(
-        geo=dict(
-            scope='usa',
-            projection=dict(type='albers usa'),
-            showlakes=False,
-            lakecolor='rgba(0,0,0,0)',
-            bgcolor='rgba(0,0,0,0)',
-            showframe=False,
-            showcoastlines=False,
-        ),
-        height=600,
-        margin=dict(l=0, r=0, t=30, b=0),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
+## Cancellations and diversions per state, from the same season sums as the delay map
+def state_disruptions(store, selected_years, carrier=None):
+    year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
+
+    measure = st.radio("Disruption", list(DISRUPTION_METRICS), horizontal=True, key='state_disruption_metric')
+    metric = DISRUPTION_METRICS[measure]
+    rate_label, _, axis_label, colorscale = RATE_VIEWS[metric]
+
+    state_rates = entity_metric(store, 'state', metric, selected_years, carrier=carrier)
+    state_rates = state_rates[state_rates.index.isin(state_abbrev_to_name.keys())]
+    if state_rates.empty:
+        st.warning("No data available for the selected filters.")
+        return
+
+    state_values = state_rates.rename('rate').rename_axis('airport_state').reset_index()
+    state_values['airport_state_full'] = state_values['airport_state'].map(state_abbrev_to_name)
+    highest_state = top_k(state_rates, 1).index[0]
+    lowest_state = top_k(state_rates, 1, largest=False).index[0]
+
+    carrier_label = f" for {carrier}" if carrier else ""
+    st.markdown(f"<h2 style='font-size: 24px;'>{measure} Percentage by States{carrier_label}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+    st.markdown(
+        f"Highest: <b style='color:#d62728;'>{state_abbrev_to_name[highest_state]} ({state_rates[highest_state]:.2f}%)</b> · "
+        f"Lowest: <b style='color:#2ca02c;'>{state_abbrev_to_name[lowest_state]} ({state_rates[lowest_state]:.2f}%)</b>",
+        unsafe_allow_html=True
+    )
+    st.plotly_chart(
+        build_state_map_figure(state_values, 'rate', colorscale, axis_label, rate_label),
+        use_container_width=True,
+        key='state_disruption_map',
     )
 
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    # Season trend for all flights and the highest and lowest state
+    state_season = store.aggregate(keep=('season', 'state'), season=selected_years, carrier=carrier)
+    total_season = state_season.groupby(level='season').sum()
+    states = list(dict.fromkeys([highest_state, lowest_state]))
+    fig = build_rate_trend_figure(state_season, total_season, states, metric)
+    fig.for_each_trace(lambda trace: trace.update(name=state_abbrev_to_name.get(trace.name, trace.name)))
+    st.markdown(f"<h2 style='font-size: 24px;'>{measure} Trend Across Years{carrier_label}<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
+    st.plotly_chart(fig, use_container_width=True)
@@ -1,32 +1,96 @@
 import streamlit as st
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from src.utils import get_airline_year, format_with_dots
+from src.delay_causes import DELAY_CAUSES, cause_minutes, cause_shares
+from src.entity_search import entity_picker, get_search_index
+from src.forecast import add_forecast_traces, forecast_for_chart
+from src.rankings import entity_metric, top_k
+from src.significance import bootstrap_gap, significance_table
+from src.startup import lazy_import
+from src.utils import format_with_dots
 
-def carrier_delay_trend_and_cause(df, selected_years):
-    df = df.copy()
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    df = df[df['airline_year'].isin(selected_years)]
-    
+px = lazy_import('plotly.express')
+
+CAUSE_BREAKDOWNS = {'Share of flights': 'share', 'Minutes per delayed flight': 'minutes'}
+
+# Stacked bars of the delay causes per year, from season sums of every measure.
+# 'share' stacks each cause's delayed flights as a percentage of all flights (adding up to the delay %);
+# 'minutes' stacks each cause's delay minutes per delayed flight (adding up to the average delay).
+def build_cause_breakdown_figure(yearly, breakdown='share'):
+    if breakdown == 'minutes':
+        values = cause_minutes(yearly)
+        value_cols = [cause.minute_col + '_min' for cause in DELAY_CAUSES]
+        count_cols = [cause.minute_col for cause in DELAY_CAUSES]
+        count_label, value_label, y_title = 'Delay Minutes', 'Minutes per delayed flight', 'Minutes per Delayed Flight'
+    else:
+        values = cause_shares(yearly)
+        value_cols = [cause.count_col + '_pct' for cause in DELAY_CAUSES]
+        count_cols = [cause.count_col for cause in DELAY_CAUSES]
+        count_label, value_label, y_title = 'Total Delay', 'Percentage (of all flights)', 'Percentage of Flight Delays (%)'
+    unit = '' if breakdown == 'minutes' else '%'
+
+    fig2 = go.Figure()
+    for cause, value_col, count_col in zip(DELAY_CAUSES, value_cols, count_cols):
+        formatted_values = yearly[count_col].apply(format_with_dots)
+        percentages = values[value_col]
+        customdata = pd.DataFrame({'val': formatted_values, 'pct': percentages.round(2)}).values
+        fig2.add_trace(go.Bar(
+            x=yearly['airline_year'],
+            y=percentages,
+            name=cause.label,
+            marker_color=cause.color,
+            meta=[cause.label] * len(yearly),
+            customdata=customdata,
+            hovertemplate=(
+                '<b>%{x}</b><br>'
+                '<b>%{meta}</b><br>'
+                f'{count_label}: <b>%{{customdata[0]}}</b><br>'
+                f'{value_label}: <b>%{{customdata[1]:.2f}}{unit}</b><extra></extra>'
+            )
+        ))
+    fig2.update_layout(
+        barmode='stack',
+        xaxis=dict(title="Year", tickangle=45),
+        yaxis=dict(title=y_title),
+        height=500,
+        margin=dict(t=0, b=0, l=0, r=20),
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.05,
+            xanchor="center",
+            x=0.465,
+        )
+    )
+    fig2.update_annotations(font_size=16)
+    return fig2
+
+# `carrier_season` holds the fused carrier x season sums of every measure for the selected years
+def carrier_delay_trend_and_cause(dataset_path, store, carrier_season, selected_years, state=None):
     # Calculate delay percentage per carrier per year
-    carrier_year = df.groupby(['carrier_name', 'airline_year']).agg(
-        total_del15=('arr_del15', 'sum'),
-        total_flights=('arr_flights', 'sum')
-    ).reset_index()
+    carrier_year = (
+        carrier_season[['arr_del15', 'arr_flights']]
+        .rename(columns={'arr_del15': 'total_del15', 'arr_flights': 'total_flights'})
+        .rename_axis(['airline_year', 'carrier_name'])
+        .reset_index()
+    )
     carrier_year['delay_pct'] = (carrier_year['total_del15'] / carrier_year['total_flights']) * 100
 
-    # Get average delay percentage for each carrier (over selected years)
-    avg_delay = carrier_year.groupby('carrier_name')['delay_pct'].mean().sort_values(ascending=False)
-    default_carriers = [avg_delay.index[0], avg_delay.index[-1]] if len(avg_delay) > 1 else avg_delay.index.tolist()
+    # Default to the carriers with the highest and lowest delay percentage over the selected years
+    avg_delay = entity_metric(store, 'carrier', 'delay_pct', selected_years, state=state)
+    if avg_delay.empty:
+        return
+    default_carriers = list(dict.fromkeys([top_k(avg_delay, 1).index[0], top_k(avg_delay, 1, largest=False).index[0]]))
 
-    # Carrier selection
-    carriers = st.multiselect(
+    # Carrier selection; typing a code or an earlier name of a carrier finds it too
+    carriers = entity_picker(
+        get_search_index(store),
+        'carrier',
         'Select 2 Carriers to Compare',
-        options=avg_delay.index.tolist(),
-        default=default_carriers,
-        max_selections=2,
-        help='Default: carrier with highest and lowest delay percentage.'
+        avg_delay.index.tolist(),
+        default_carriers,
+        help='Default: carrier with highest and lowest delay percentage. Search by name, code or earlier name.'
     )
     if len(carriers) != 2:
         st.warning('Please select exactly 2 carriers.')
@@ -79,15 +143,28 @@ def carrier_delay_trend_and_cause(df, selected_years):
         )
     )
     fig.update_layout(margin=dict(t=20, b=40, l=40, r=20))
+
+    # Next season's projection per carrier; forecasts cover all of a carrier's flights, so not with a state filter
+    if state is None:
+        last_rows = carrier_year[carrier_year['carrier_name'].isin(carriers)].groupby('carrier_name', observed=True).last()
+        forecast = forecast_for_chart(store, year_order[-1], by='carrier', entities=carriers)
+        add_forecast_traces(fig, forecast, {
+            trace.name: (trace.name, last_rows.loc[trace.name, 'airline_year'], last_rows.loc[trace.name, 'delay_pct'], trace.line.color)
+            for trace in fig.data
+            if last_rows.loc[trace.name, 'airline_year'] == year_order[-1]
+        })
     st.plotly_chart(fig, use_container_width=True)
 
+    # Bootstrap interval and p-value for the gap between the two carriers
+    significance_table(bootstrap_gap(dataset_path, 'carrier_name', carriers, selected_years, state), carriers)
+
     st.write("")
 
     # Stacked bar for each carrier (1 row, 2 columns)
+    breakdown = st.radio("Cause breakdown", list(CAUSE_BREAKDOWNS), horizontal=True, key='carrier_cause_breakdown')
     colA, colB = st.columns(2)
     for idx, carrier in enumerate(carriers):
-        cdf = df[df['carrier_name'] == carrier]
-        if cdf.empty:
+        if carrier not in carrier_season.index.get_level_values('carrier'):
             (colA if idx == 0 else colB).warning(f'No data for {carrier}')
             continue
 
@@ -98,49 +175,6 @@ def carrier_delay_trend_and_cause(df, selected_years):
             unsafe_allow_html=True
         )
 
-        delay_causes = [
-            ("carrier_ct", "Carrier", "#636EFA"),
-            ("weather_ct", "Weather", "#EF553B"),
-            ("nas_ct", "NAS (National Airspace System)", "#00CC96"),
-            ("security_ct", "Security", "#AB63FA"),
-            ("late_aircraft_ct", "Late Aircraft", "#FFA15A")
-        ]
-        yearly = cdf.groupby('airline_year')[[c[0] for c in delay_causes] + ['arr_flights']].sum().reset_index()
-        for col, _, _ in delay_causes:
-            yearly[col + '_pct'] = (yearly[col] / yearly['arr_flights']) * 100
-        fig2 = go.Figure()
-        for col, label, color in delay_causes:
-            formatted_values = yearly[col].apply(format_with_dots)
-            percentages = yearly[col + '_pct']
-            customdata = pd.DataFrame({'val': formatted_values, 'pct': percentages.round(2)}).values
-            fig2.add_trace(go.Bar(
-                x=yearly['airline_year'],
-                y=percentages,
-                name=label,
-                marker_color=color,
-                meta=[label] * len(yearly),
-                customdata=customdata,
-                hovertemplate=(
-                    '<b>%{x}</b><br>'
-                    '<b>%{meta}</b><br>'
-                    'Total Delay: <b>%{customdata[0]}</b><br>'
-                    'Percentage (of all flights): <b>%{customdata[1]:.2f}%</b><extra></extra>'
-                )
-            ))
-        fig2.update_layout(
-            barmode='stack',
-            xaxis=dict(title="Year", tickangle=45),
-            yaxis=dict(title="Percentage of Flight Delays (%)"),
-            height=500,
-            margin=dict(t=0, b=0, l=0, r=20),
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.05,
-                xanchor="center",
-                x=0.465,
-            )
-        )
-        fig2.update_annotations(font_size=16)
-        (colA if idx == 0 else colB).plotly_chart(fig2, use_container_width=True)
\ No newline at end of file
+        yearly = carrier_season.xs(carrier, level='carrier').rename_axis('airline_year').reset_index()
+        fig2 = build_cause_breakdown_figure(yearly, CAUSE_BREAKDOWNS[breakdown])
+        (colA if idx == 0 else colB).plotly_chart(fig2, use_container_width=True)
@@ -0,0 +1,61 @@
+import streamlit as st
+
+from src.state_utils import state_abbrev_to_name
+
+# Cross-filter selections live in session state so they carry across the State and Carrier pages.
+# Every filtered view is answered from the carrier x state x season cube of the aggregate store.
+STATE_FILTER_KEY = 'cross_filter_state'
+CARRIER_FILTER_KEY = 'cross_filter_carrier'
+
+def get_state_filter():
+    return st.session_state.get(STATE_FILTER_KEY)
+
+def get_carrier_filter():
+    return st.session_state.get(CARRIER_FILTER_KEY)
+
+def clear_filter(key):
+    st.session_state.pop(key, None)
+
+# Clicked state on the choropleth; points are matched back to the map locations by index
+def state_from_map_event(event, locations):
+    for point in event.get('selection', {}).get('points', []):
+        if point.get('location'):
+            return point['location']
+        if point.get('curve_number', 0) == 0 and point.get('point_index') is not None:
+            return list(locations)[point['point_index']]
+    return None
+
+# Clicked bar on the carrier ranking chart
+def carrier_from_bar_event(event):
+    for point in event.get('selection', {}).get('points', []):
+        if point.get('x'):
+            return point['x']
+    return None
+
+# Store a newly clicked value and rerun so every chart on the page picks it up.
+# Chart selections persist across reruns, so only a change in the clicked value counts;
+# otherwise a cleared filter would be restored from the old selection straight away.
+def apply_selection(key, value):
+    seen_key = f"{key}_seen"
+    if value == st.session_state.get(seen_key):
+        return
+    st.session_state[seen_key] = value
+    if value and st.session_state.get(key) != value:
+        st.session_state[key] = value
+        st.rerun()
+
+def cross_filter_banner(key, describe):
+    value = st.session_state.get(key)
+    if not value:
+        return
+    col1, col2 = st.columns([5, 1])
+    col1.info(describe(value))
+    if col2.button("Clear filter", key=f"clear_{key}"):
+        clear_filter(key)
+        st.rerun()
+
+def describe_state_filter(state):
+    return f"Filtered to flights arriving in {state_abbrev_to_name.get(state, state)} ({state}). Click another state on the State page map to change it."
+
+def describe_carrier_filter(carrier):
+    return f"Map colored by {carrier} only. Click another carrier on the Carrier page ranking to change it."
@@ -0,0 +1,122 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.aggregate_store import get_dataset_version
+from src.anomaly_index import (
+    BASELINE_MONTHS, CAUSES, FLIGHTS, find_anomalies, series_history, update_index
+)
+from src.delay_causes import DELAY_CAUSES
+from src.memory_cache import memory_cached
+from src.utils import format_with_dots
+
+# Index brought up to date on first use of each dataset version (new months are appended incrementally)
+@memory_cached('anomaly_index', version=get_dataset_version)
+def load_anomaly_index(dataset_path):
+    return update_index(dataset_path)
+
+SIGNALS = {'Delay rate': 'rate_z', 'Cause mix': 'mix_shift'}
+
+## Anomalies: carrier x airport months that break from their own recent history
+def delay_anomalies(dataset_path, store, selected_years):
+    year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
+    index = load_anomaly_index(dataset_path)
+
+    col1, col2, col3 = st.columns([1, 1, 1], gap="large")
+    with col1:
+        signal = SIGNALS[st.radio("Signal", list(SIGNALS), horizontal=True)]
+    with col2:
+        if signal == 'rate_z':
+            direction = {'Worse': 'worse', 'Better': 'better', 'Both': 'both'}[
+                st.radio("Direction", ['Worse', 'Better', 'Both'], horizontal=True)
+            ]
+            threshold = st.slider("Minimum deviation (standard deviations)", 2.0, 8.0, 3.0, 0.5)
+        else:
+            direction = 'both'
+            threshold = st.slider("Minimum shift in cause mix (percentage points)", 10, 60, 25, 5)
+    with col3:
+        k = st.slider("How many", min_value=10, max_value=50, value=20, step=10)
+
+    anomalies = find_anomalies(index, selected_years, signal, k, threshold, direction)
+    if anomalies.empty:
+        st.info("No carrier and airport month deviates that much from its baseline in the selected years.")
+        return
+
+    airport_names = dict(zip(store.dims.get('airport', []), store.labels.get('airport', [])))
+    anomalies['Carrier'] = anomalies['carrier'].map(lambda code: index['carrier_names'].get(code, code))
+    anomalies['Airport'] = anomalies['airport'].map(lambda code: airport_names.get(code, code))
+
+    title = "Unusual Delay Rates" if signal == 'rate_z' else "Unusual Delay Cause Mix"
+    st.markdown(f"<h2 style='font-size: 24px;'>{title} by Carrier and Airport<br><span style='font-size: 20px;'>({year_range}, against the previous {BASELINE_MONTHS} months)</span></h2>", unsafe_allow_html=True)
+
+    table = anomalies[['month', 'Carrier', 'Airport', 'arr_flights', 'delay_pct', 'baseline_pct', 'rate_z', 'mix_shift']].rename(columns={
+        'month': 'Month', 'arr_flights': 'Flights', 'delay_pct': 'Delay %',
+        'baseline_pct': 'Baseline Delay %', 'rate_z': 'Deviation (σ)', 'mix_shift': 'Cause Mix Shift (pp)',
+    })
+    table['Flights'] = table['Flights'].apply(format_with_dots)
+    st.dataframe(table.round(2), hide_index=True, use_container_width=True)
+
+    labels = [f"{row.month} · {row.Carrier} · {row.Airport}" for row in anomalies.itertuples()]
+    picked = st.selectbox("Show history for", range(len(labels)), format_func=lambda i: labels[i])
+    anomaly_detail(index, anomalies.iloc[picked])
+
+def anomaly_detail(index, anomaly):
+    history = series_history(index, anomaly['series_pos'])
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=list(history['month']) + list(history['month'][::-1]),
+        y=list(history['upper']) + list(history['lower'][::-1]),
+        fill='toself',
+        fillcolor='rgba(42, 120, 195, 0.2)',
+        line=dict(width=0),
+        hoverinfo='skip',
+        name='Baseline ± 2σ',
+    ))
+    fig.add_trace(go.Scatter(
+        x=history['month'], y=history['baseline_pct'],
+        line=dict(color='#2A78C3', dash='dash'), name='Baseline',
+        hovertemplate='Month: <b>%{x}</b><br>Baseline: <b>%{y:.2f}%</b><extra></extra>',
+    ))
+    fig.add_trace(go.Scatter(
+        x=history['month'], y=history['delay_pct'],
+        mode='lines+markers', line=dict(color='#F5F9FF'), name='Delay %',
+        hovertemplate='Month: <b>%{x}</b><br>Delay Percentage: <b>%{y:.2f}%</b><extra></extra>',
+    ))
+    fig.add_trace(go.Scatter(
+        x=[anomaly['month']], y=[anomaly['delay_pct']],
+        mode='markers', marker=dict(color='#d62728', size=14, symbol='circle-open', line=dict(width=3)),
+        name='Flagged', hoverinfo='skip',
+    ))
+    fig.update_layout(
+        xaxis_title="Month",
+        yaxis_title="Percentage of Flight Delays (%)",
+        height=380,
+        margin=dict(t=20, b=40, l=40, r=20),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Cause mix of the flagged month next to the baseline mix of the months before it
+    sums = index['sums'][anomaly['series_pos']]
+    month_pos = anomaly['month_pos']
+    baseline_months = sums[max(month_pos - BASELINE_MONTHS, 0):month_pos]
+    baseline_months = baseline_months[baseline_months[:, FLIGHTS] > 0]
+    rows = {'Flagged month': sums[month_pos, CAUSES], f'Previous {BASELINE_MONTHS} months': baseline_months[:, CAUSES].sum(axis=0)}
+
+    bar_fig = go.Figure()
+    for i, cause in enumerate(DELAY_CAUSES):
+        shares = [values[i] / values.sum() * 100 if values.sum() else np.nan for values in rows.values()]
+        bar_fig.add_trace(go.Bar(
+            y=list(rows), x=shares, name=cause.label, orientation='h', marker_color=cause.color,
+            meta=cause.label,
+            hovertemplate='<b>%{meta}</b><br>%{y}: <b>%{x:.2f}%</b> of delays<extra></extra>',
+        ))
+    bar_fig.update_layout(
+        barmode='stack',
+        xaxis=dict(title='Share of Delays', range=[0, 100], ticksuffix='%'),
+        height=220,
+        margin=dict(t=10, l=20, r=20, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    st.plotly_chart(bar_fig, use_container_width=True)
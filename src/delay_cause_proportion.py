@@ -1,53 +1,38 @@
 import numpy as np
-import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
-from src.utils import format_with_dots, get_airline_year
+from src.delay_causes import CAUSE_COLORS, CAUSE_COUNT_COLUMNS, CAUSE_LABELS, DELAY_CAUSES, cause_mix
+from src.utils import format_with_dots
 
-@st.cache_data(show_spinner=False)
-def compute_delay_sums(df, selected_years):
-        # Add airline year column
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    df = df[df['airline_year'].isin(selected_years)]
-    
-    if df.empty:
+def compute_delay_sums(store, selected_years):
+    # The year slider only offers complete airline years, so every selected season is used
+    yearly = store.aggregate(keep=('season',), season=selected_years)
+
+    if yearly.empty:
         st.warning("No data available for the selected year range.")
         return
 
-    # Remove 2023/2024 data
-    df = df[df['airline_year'] != "2023/2024"]
-
-    # Select only airline years from 2013/2014 to 2022/2023
-    allowed_years = [f"{y}/{y+1}" for y in range(2013, 2023)]
-    df = df[df['airline_year'].isin(allowed_years)]
-
     # --- Horizontal Stacked Bar Chart (Most Recent Year Only) ---
-    latest_airline_year = sorted(df['airline_year'].unique())[-1]
-    recent_data = df[df['airline_year'] == latest_airline_year]
+    latest_airline_year = yearly.index[-1]
+    percentages = cause_mix(yearly.loc[[latest_airline_year]])
 
-    grouped = recent_data.groupby('airline_year')[['carrier_ct', 'late_aircraft_ct', 'nas_ct', 'weather_ct', 'security_ct']].sum()
-    percentages = grouped.div(grouped.sum(axis=1), axis=0) * 100
-    
     return percentages, latest_airline_year, selected_years
 
-def delay_cause_proportion(df, selected_years):
+def delay_cause_proportion(store, selected_years):
     # --- Preprocess Data ---
-    percentages, latest_airline_year, selected_years = compute_delay_sums(df, selected_years)
-
-    delay_causes = [
-        ('carrier_ct', 'Carrier', '#636EFA'),
-        ('weather_ct', 'Weather', '#EF553B'),
-        ('nas_ct', 'NAS (National Airspace System)', '#00CC96'),
-        ('security_ct', 'Security', '#AB63FA'),
-        ('late_aircraft_ct', 'Late Aircraft', '#FFA15A'),
-    ]
+    delay_sums = compute_delay_sums(store, selected_years)
+    if delay_sums is None:
+        return
+    percentages, latest_airline_year, selected_years = delay_sums
+
     st.write("")
 
     # --- Horizontal Stacked Bar (Most Recent Year Only) ---
     bar_fig = go.Figure()
-    for col, label, color in delay_causes:
-        pct = percentages[col].values[0]
+    for cause in DELAY_CAUSES:
+        label, color = cause.label, cause.color
+        pct = percentages[cause.count_col].values[0]
         bar_fig.add_trace(go.Bar(
             y=percentages.index,
             x=[pct],
@@ -81,27 +66,19 @@ def delay_cause_proportion(df, selected_years):
     year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
     st.markdown(f"<h2 style='font-size: 24px;'>Delay Cause Proportions Trend Across Years<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)
 
-    # Filter df again (to use it for the pie chart)
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    df = df[df['airline_year'].isin(selected_years)]
-    
-    if df.empty:
+    # Sum the causes over the whole selected range (to use it for the pie chart)
+    range_total = store.aggregate(season=selected_years)
+
+    if range_total['arr_flights'] == 0:
         st.warning("No data available for the pie chart.")
         return
 
-    delay_total = df[["carrier_ct", "weather_ct", "nas_ct", "security_ct", "late_aircraft_ct"]].sum()
-    label_map = {
-        "carrier_ct": "Carrier",
-        "weather_ct": "Weather",
-        "nas_ct": "NAS (National Airspace System)",
-        "security_ct": "Security",
-        "late_aircraft_ct": "Late Aircraft"
-    }
+    delay_total = range_total[CAUSE_COUNT_COLUMNS]
 
-    labels = [label_map[col] for col in delay_total.index]
+    labels = CAUSE_LABELS
     values = delay_total.values
     formatted_values = [format_with_dots(v) for v in values]
-    colors = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A']
+    colors = CAUSE_COLORS
     percentages = (values / np.sum(values)) * 100
     custom_labels = [f"<b>{label}</b><br>{percent:.2f}%" for label, percent in zip(labels, percentages)]
 
@@ -0,0 +1,51 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Single registry of delay causes: the count column (flights delayed by the cause),
+# the minute column (delay minutes attributed to it), and how the charts show it
+DelayCause = namedtuple('DelayCause', ['key', 'label', 'color', 'count_col', 'minute_col'])
+
+DELAY_CAUSES = [
+    DelayCause('carrier', 'Carrier', '#636EFA', 'carrier_ct', 'carrier_delay'),
+    DelayCause('weather', 'Weather', '#EF553B', 'weather_ct', 'weather_delay'),
+    DelayCause('nas', 'NAS (National Airspace System)', '#00CC96', 'nas_ct', 'nas_delay'),
+    DelayCause('security', 'Security', '#AB63FA', 'security_ct', 'security_delay'),
+    DelayCause('late_aircraft', 'Late Aircraft', '#FFA15A', 'late_aircraft_ct', 'late_aircraft_delay'),
+]
+
+CAUSE_COUNT_COLUMNS = [cause.count_col for cause in DELAY_CAUSES]
+CAUSE_MINUTE_COLUMNS = [cause.minute_col for cause in DELAY_CAUSES]
+CAUSE_LABELS = [cause.label for cause in DELAY_CAUSES]
+CAUSE_COLORS = [cause.color for cause in DELAY_CAUSES]
+
+# Percentage of `total` for every cause and every row at once:
+# the (rows x causes) matrix divided by the per-row total vector.
+# With the default arguments this is each cause's share of all flights; pass
+# CAUSE_MINUTE_COLUMNS and 'arr_delay' for each cause's share of delay minutes.
+def cause_shares(df, columns=CAUSE_COUNT_COLUMNS, total='arr_flights'):
+    matrix = df[columns].to_numpy(dtype=np.float64)
+    totals = df[total].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = matrix / totals[:, None] * 100
+    return pd.DataFrame(shares, index=df.index, columns=[col + '_pct' for col in columns])
+
+# Percentage of each cause within the delays of a row (the row sums to 100)
+def cause_mix(df, columns=CAUSE_COUNT_COLUMNS):
+    matrix = df[columns].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = matrix / matrix.sum(axis=1, keepdims=True) * 100
+    return pd.DataFrame(shares, index=df.index, columns=columns)
+
+# Cause columns plus their `_pct` shares, ready for the stacked bar charts
+def with_cause_shares(df, columns=CAUSE_COUNT_COLUMNS, total='arr_flights'):
+    return pd.concat([df, cause_shares(df, columns, total)], axis=1)
+
+# Delay minutes per delayed flight for every cause (together they make up roughly arr_delay / arr_del15)
+def cause_minutes(df, columns=CAUSE_MINUTE_COLUMNS, delayed='arr_del15'):
+    matrix = df[columns].to_numpy(dtype=np.float64)
+    totals = df[delayed].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        minutes = matrix / totals[:, None]
+    return pd.DataFrame(minutes, index=df.index, columns=[col + '_min' for col in columns])
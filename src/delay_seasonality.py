@@ -0,0 +1,141 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.aggregate_store import MEASURES, PREFIX_ARRAYS
+from src.delay_causes import CAUSE_COUNT_COLUMNS, DELAY_CAUSES
+from src.memory_cache import memory_cached
+from src.state_utils import state_abbrev_to_name
+
+# Entity x calendar month sums for the selected seasons. Every (entity, month, measure) cell gets an
+# integer code, and one np.bincount over those codes fills the dense (entities x 12 x measures) matrix.
+MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+SEASONALITY_MEASURES = ['arr_flights', 'arr_del15'] + CAUSE_COUNT_COLUMNS
+SEASONALITY_ENTITIES = {'Carriers': 'carrier', 'States': 'state', 'Airports': 'airport'}
+SEASONALITY_VIEWS = ['Delay %', 'Dominant cause']
+
+
+# values: (records x measures); entity_codes and month_codes (0-11) per record
+def entity_month_sums(entity_codes, month_codes, values, n_entities):
+    n_measures = values.shape[1]
+    cell = (entity_codes.astype(np.int64) * 12 + month_codes) * n_measures
+    codes = (cell[:, None] + np.arange(n_measures)).ravel()
+    sums = np.bincount(codes, weights=values.ravel(), minlength=n_entities * 12 * n_measures)
+    return sums.reshape(n_entities, 12, n_measures)
+
+# Monthly sums come from the store's prefix arrays (carrier, state or airport), no rows needed
+@memory_cached('seasonality')
+def get_seasonality_sums(store, by, selected_years):
+    prefix = np.asarray(store.arrays[PREFIX_ARRAYS[by][0]])
+    monthly = np.diff(prefix, axis=0)[:, :, [MEASURES.index(col) for col in SEASONALITY_MEASURES]]
+
+    # Months of the selected airline years (Aug-Jul)
+    years = np.array([int(label[:4]) for label in store.months])
+    months = np.array([int(label[5:]) for label in store.months])
+    season_start = np.where(months >= 8, years, years - 1)
+    in_range = np.isin(season_start, [int(season[:4]) for season in selected_years])
+    monthly = monthly[in_range]
+
+    n_months, n_entities = monthly.shape[:2]
+    entity_codes = np.tile(np.arange(n_entities), n_months)
+    month_codes = np.repeat(months[in_range] - 1, n_entities)
+    return entity_month_sums(entity_codes, month_codes, monthly.reshape(-1, len(SEASONALITY_MEASURES)), n_entities)
+
+def get_entity_labels(store, entity):
+    if entity == 'state':
+        return [f"{state_abbrev_to_name.get(code, code)} ({code})" if code else 'Unknown' for code in store.dims['state']]
+    return list(store.labels.get(entity, store.dims[entity]))
+
+
+## Seasonality: delay % and dominant delay cause per entity and calendar month
+def delay_seasonality(store, selected_years):
+    year_range = f"{selected_years[0]}" if selected_years[0] == selected_years[-1] else f"{selected_years[0]} - {selected_years[-1]}"
+
+    col1, col2, col3 = st.columns([1, 1, 1], gap="large")
+    with col1:
+        entity_label = st.radio("Rows", list(SEASONALITY_ENTITIES), horizontal=True)
+        entity = SEASONALITY_ENTITIES[entity_label]
+    with col2:
+        view = st.radio("Show", SEASONALITY_VIEWS, horizontal=True)
+    with col3:
+        # Small airports swing wildly from a handful of flights, so they can be left out
+        min_flights = st.number_input("Minimum flights", min_value=0, value=1000 if entity == 'airport' else 0, step=500)
+
+    sums = get_seasonality_sums(store, entity, selected_years)
+    labels = np.asarray(get_entity_labels(store, entity), dtype=object)
+
+    flights = sums[:, :, SEASONALITY_MEASURES.index('arr_flights')]
+    delayed = sums[:, :, SEASONALITY_MEASURES.index('arr_del15')]
+    total_flights = flights.sum(axis=1)
+    keep = (total_flights > max(min_flights, 0)) & (labels != 'Unknown')
+    if not keep.any():
+        st.warning("No data available for the selected filters.")
+        return
+
+    # Rows ordered by delay % over the whole range, worst first
+    overall = delayed.sum(axis=1) / np.where(total_flights > 0, total_flights, np.nan)
+    rows = np.flatnonzero(keep)
+    rows = rows[np.argsort(-overall[rows], kind='stable')]
+
+    st.markdown(
+        f"<h2 style='font-size: 24px;'>{'Delay Percentage' if view == 'Delay %' else 'Dominant Delay Cause'} by {entity_label[:-1]} and Month<br>"
+        f"<span style='font-size: 20px;'>({year_range})</span></h2>",
+        unsafe_allow_html=True
+    )
+    height = max(350, 22 * len(rows) + 120)
+    if view == 'Delay %':
+        fig = build_delay_heatmap(labels[rows], flights[rows], delayed[rows], height)
+    else:
+        fig = build_cause_heatmap(labels[rows], sums[rows][:, :, 2:], height)
+    st.plotly_chart(fig, use_container_width=True)
+
+def build_delay_heatmap(labels, flights, delayed, height):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delay_pct = np.where(flights > 0, delayed / flights * 100, np.nan)
+    fig = go.Figure(go.Heatmap(
+        z=delay_pct,
+        x=MONTH_LABELS,
+        y=list(labels),
+        colorscale='Blues',
+        colorbar_title='Delay %',
+        customdata=flights,
+        hovertemplate='<b>%{y}</b><br>Month: <b>%{x}</b><br>Delay Percentage: <b>%{z:.2f}%</b><br>Flights: <b>%{customdata:,.0f}</b><extra></extra>',
+    ))
+    fig.update_layout(
+        height=height,
+        yaxis=dict(autorange='reversed'),
+        margin=dict(t=20, b=40, l=40, r=20),
+    )
+    return fig
+
+# Cause with the most delayed flights in each cell, colored like the cause charts elsewhere
+def build_cause_heatmap(labels, cause_counts, height):
+    totals = cause_counts.sum(axis=2)
+    dominant = cause_counts.argmax(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(totals > 0, cause_counts.max(axis=2) / totals * 100, np.nan)
+    z = np.where(totals > 0, dominant, np.nan)
+
+    n = len(DELAY_CAUSES)
+    colorscale = []
+    for i, cause in enumerate(DELAY_CAUSES):
+        colorscale += [[i / n, cause.color], [(i + 1) / n, cause.color]]
+    cause_names = np.array([cause.label for cause in DELAY_CAUSES], dtype=object)
+
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=MONTH_LABELS,
+        y=list(labels),
+        zmin=-0.5,
+        zmax=n - 0.5,
+        colorscale=colorscale,
+        colorbar=dict(tickvals=list(range(n)), ticktext=list(cause_names), title='Cause'),
+        customdata=np.dstack([cause_names[dominant], np.round(share, 1)]),
+        hovertemplate='<b>%{y}</b><br>Month: <b>%{x}</b><br>Dominant Cause: <b>%{customdata[0]}</b><br>Share of Delays: <b>%{customdata[1]}%</b><extra></extra>',
+    ))
+    fig.update_layout(
+        height=height,
+        yaxis=dict(autorange='reversed'),
+        margin=dict(t=20, b=40, l=40, r=20),
+    )
+    return fig
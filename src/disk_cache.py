@@ -0,0 +1,191 @@
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+
+from src.memory_cache import copy_value, make_key_part, memory_cache
+from src.utils import format_bytes
+
+# Persistent cache shared by every dashboard process on the host.
+# Entries are keyed by dataset version plus call parameters, so a new dataset never serves stale results.
+CACHE_DIR = os.environ.get(
+    'DASHBOARD_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'dashboard')
+)
+CACHE_MAX_BYTES = int(float(os.environ.get('DASHBOARD_CACHE_MAX_MB', 512)) * 1024 * 1024)
+ENTRY_SUFFIX = '.pkl'
+
+
+class DiskCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    # Entries live in one folder per dataset version so a whole version can be dropped at once
+    def entry_path(self, version, key):
+        return os.path.join(self.directory, version, key + ENTRY_SUFFIX)
+
+    def get(self, version, key):
+        path = self.entry_path(version, key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None, False
+        except Exception:
+            # Truncated, or pickled by code that has since changed: a miss, and the entry is dropped
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None, False
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value, True
+
+    # Write to a temporary file in the same folder and rename it, so concurrent
+    # processes only ever see complete entries
+    def set(self, version, key, value):
+        path = self.entry_path(version, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for version in os.listdir(self.directory):
+            version_dir = os.path.join(self.directory, version)
+            if not os.path.isdir(version_dir):
+                continue
+            for name in os.listdir(version_dir):
+                if not name.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(version_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                result.append({
+                    'version': version,
+                    'key': name[:-len(ENTRY_SUFFIX)],
+                    'path': path,
+                    'size': stat.st_size,
+                    'last_used': stat.st_mtime,
+                })
+        return result
+
+    # Remove least recently used entries until the cache fits its size budget
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda e: e['last_used'])
+        total = sum(e['size'] for e in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry['path'])
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+
+    def clear(self, version=None, keep_version=None):
+        removed = 0
+        for entry in self.entries():
+            if version is not None and entry['version'] != version:
+                continue
+            if keep_version is not None and entry['version'] == keep_version:
+                continue
+            try:
+                os.remove(entry['path'])
+                removed += 1
+            except FileNotFoundError:
+                pass
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            try:
+                os.rmdir(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return removed
+
+    def stats(self):
+        versions = {}
+        for entry in self.entries():
+            info = versions.setdefault(entry['version'], {'entries': 0, 'bytes': 0})
+            info['entries'] += 1
+            info['bytes'] += entry['size']
+        return {
+            'directory': self.directory,
+            'max_bytes': self.max_bytes,
+            'bytes': sum(v['bytes'] for v in versions.values()),
+            'entries': sum(v['entries'] for v in versions.values()),
+            'versions': versions,
+        }
+
+
+disk_cache = DiskCache()
+
+
+# Keys are built like the memory cache's, except that frames are refused: a disk entry must only
+# depend on the dataset version and plain parameters
+def reject_frame(value):
+    raise TypeError("disk_cached functions take the aggregate store, not DataFrames")
+
+# Cache a function's result on disk.
+# The first argument provides the dataset version: either the aggregate store itself,
+# or any value `version` maps to a version string (e.g. a csv path).
+def disk_cached(name, version=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(source, *args, **kwargs):
+            dataset_version = version(source) if version else source.dataset_hash
+            params = (name, make_key_part(args, reject_frame), make_key_part(kwargs, reject_frame))
+            key = hashlib.sha1(repr(params).encode('utf-8')).hexdigest()
+
+            # Recently used results are also kept in the process's memory budget
+            memory_key = (name, dataset_version, key)
+            value, hit = memory_cache.get(memory_key)
+            if hit:
+                return value
+
+            value, hit = disk_cache.get(dataset_version, key)
+            if not hit:
+                value = func(source, *args, **kwargs)
+                disk_cache.set(dataset_version, key, value)
+            memory_cache.set(memory_key, value)
+            return copy_value(value)
+        return wrapper
+    return decorator
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or clear the persistent dashboard cache.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('info', help='show cache size per dataset version')
+    clear_parser = subparsers.add_parser('clear', help='remove cached entries')
+    clear_parser.add_argument('--version', help='only remove entries of this dataset version')
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        stats = disk_cache.stats()
+        print(f"{stats['directory']}: {stats['entries']} entries, "
+              f"{format_bytes(stats['bytes'])} of {format_bytes(stats['max_bytes'])}")
+        for dataset_version, info in stats['versions'].items():
+            print(f"  {dataset_version}: {info['entries']} entries, {format_bytes(info['bytes'])}")
+    elif args.command == 'clear':
+        removed = disk_cache.clear(version=args.version)
+        print(f"Removed {removed} entries")
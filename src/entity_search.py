@@ -0,0 +1,158 @@
+import bisect
+import re
+from collections import namedtuple
+
+import pandas as pd
+import streamlit as st
+
+from src.memory_cache import memory_cached
+from src.state_utils import state_abbrev_to_name
+
+# Type-ahead search over carriers and airports. The entries (key, display label and every name
+# an entity is known by) are written into the aggregate store header when it is built, so no raw
+# rows are read at runtime. Words match by prefix through a sorted token list; words with no prefix
+# match fall back to close spellings through a trigram index over the same tokens.
+SearchEntry = namedtuple('SearchEntry', ['kind', 'key', 'label', 'terms'])
+WORD_PATTERN = re.compile(r'[0-9a-z]+')
+PREFIX_SCORE = 0.9
+FUZZY_SCORE = 0.8
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_MIN_LENGTH = 3
+PICKER_MATCH_LIMIT = 25
+PICKER_PLACEHOLDERS = {'carrier': 'Name, code or earlier name', 'airport': 'Code, name, city or state'}
+
+
+def normalize(text):
+    return WORD_PATTERN.findall(str(text).casefold())
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Carriers are keyed by name like the store; a code that was flown under several names lists the
+# others as earlier or later names. Airports are keyed by code, with name, city and state.
+def build_search_entries(df):
+    entries = []
+
+    months = df['year'] * 12 + df['month']
+    carrier_names = df.assign(month_index=months).groupby(['carrier_name', 'carrier'])['month_index'].max().reset_index()
+    last_seen = carrier_names.groupby('carrier_name')['month_index'].max()
+    codes = carrier_names.groupby('carrier_name')['carrier'].agg(sorted)
+    for name in sorted(last_seen.index):
+        others = carrier_names[carrier_names['carrier'].isin(codes[name]) & (carrier_names['carrier_name'] != name)]['carrier_name'].unique()
+        former = sorted(other for other in others if last_seen[other] < last_seen[name])
+        later = sorted(other for other in others if last_seen[other] >= last_seen[name])
+        label = f"{name} ({', '.join(codes[name])}"
+        label += f"; formerly {', '.join(former)}" if former else ""
+        label += f"; later {', '.join(later)}" if later else ""
+        entries.append(['carrier', name, label + ")", [name, *codes[name], *others]])
+
+    latest = df.assign(month_index=months).sort_values('month_index').drop_duplicates('airport', keep='last')
+    for row in latest.sort_values('airport').itertuples(index=False):
+        details = [value for value in (row.airport_name, row.airport_city, row.airport_state) if pd.notna(value) and value != '']
+        place = ', '.join(str(value) for value in details[1:])
+        label = f"{row.airport} – {details[0]}" if pd.notna(row.airport_name) else row.airport
+        label += f" ({place})" if place else ""
+        terms = [row.airport, *details, state_abbrev_to_name.get(row.airport_state, '')]
+        entries.append(['airport', row.airport, label, [str(term) for term in terms if term]])
+    return entries
+
+
+class EntitySearchIndex:
+    def __init__(self, entries):
+        self.entries = [SearchEntry(*entry) for entry in entries]
+        self.positions = {(entry.kind, entry.key): i for i, entry in enumerate(self.entries)}
+
+        token_entries = {}
+        for i, entry in enumerate(self.entries):
+            for term in entry.terms:
+                for token in normalize(term):
+                    token_entries.setdefault(token, set()).add(i)
+        self.tokens = sorted(token_entries)
+        self.token_entries = [sorted(token_entries[token]) for token in self.tokens]
+        self.token_grams = [trigrams(token) for token in self.tokens]
+        self.grams = {}
+        for position, grams in enumerate(self.token_grams):
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(position)
+
+    def keys(self, kind):
+        return [entry.key for entry in self.entries if entry.kind == kind]
+
+    def label(self, kind, key):
+        position = self.positions.get((kind, key))
+        return self.entries[position].label if position is not None else key
+
+    # Score per token for one query word: exact and prefix matches, else trigram (Jaccard) look-alikes
+    def match_word(self, word):
+        matches = {}
+        for position in range(bisect.bisect_left(self.tokens, word), len(self.tokens)):
+            if not self.tokens[position].startswith(word):
+                break
+            matches[position] = 1.0 if self.tokens[position] == word else PREFIX_SCORE
+        if matches or len(word) < FUZZY_MIN_LENGTH:
+            return matches
+
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for position in self.grams.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        for position, count in shared.items():
+            similarity = count / (len(grams) + len(self.token_grams[position]) - count)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches[position] = FUZZY_SCORE * similarity
+        return matches
+
+    # Entries matching every query word, best first; `kind` limits results to carriers or airports
+    def search(self, query, kind=None, limit=10):
+        words = normalize(query)
+        if not words:
+            return []
+
+        scores = None
+        for word in words:
+            word_scores = {}
+            for position, score in self.match_word(word).items():
+                for entry in self.token_entries[position]:
+                    word_scores[entry] = max(word_scores.get(entry, 0), score)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {entry: score + word_scores[entry] for entry, score in scores.items() if entry in word_scores}
+
+        ranked = [entry for entry in scores if kind is None or self.entries[entry].kind == kind]
+        ranked.sort(key=lambda entry: (-scores[entry], self.entries[entry].label))
+        return [self.entries[entry] for entry in ranked[:limit]]
+
+@memory_cached('search_index')
+def get_search_index(store):
+    return EntitySearchIndex(store.header.get('search', []))
+
+
+# Two-entity picker with a search box: a query narrows the options to the index's best matches
+# (codes, cities and earlier carrier names included) while the current picks stay listed. The
+# multiselect is keyed by its defaults, so it keeps its picks while the options narrow but resets
+# when the defaults change (e.g. a new year range), as it did before.
+def entity_picker(index, kind, label, keys, default, help=None, key=None):
+    key = key or f"{kind}_picker_{'_'.join(default)}"
+    query = st.text_input(f"Search {kind}s", key=f"{key}_query", placeholder=PICKER_PLACEHOLDERS.get(kind))
+
+    options = keys
+    if query.strip():
+        available = set(keys)
+        picked = [entity for entity in st.session_state.get(key, default) if entity in available]
+        matches = [entry.key for entry in index.search(query, kind, limit=len(index.entries)) if entry.key in available]
+        options = list(dict.fromkeys(picked + matches[:PICKER_MATCH_LIMIT]))
+        if not matches:
+            st.caption(f"No {kind}s match \"{query}\".")
+
+    return st.multiselect(
+        label,
+        options=options,
+        default=[entity for entity in default if entity in options],
+        max_selections=2,
+        format_func=lambda entity: index.label(kind, entity),
+        help=help,
+        key=key,
+    )
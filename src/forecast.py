@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from src.aggregate_store import MEASURES, PREFIX_ARRAYS
+from src.disk_cache import disk_cached
+from src.month_windows import parse_month
+
+# Next-season delay % for every carrier and state (and all flights), from one batched fit.
+# Each monthly delay-rate series gets a linear trend plus yearly harmonics, weighted by its
+# flights; the normal equations of all series are built with einsum and solved together.
+FIT_MONTHS = 60
+HARMONICS = 2
+# Months with fewer flights are left out of a series' fit
+MIN_FLIGHTS = 100
+Z_95 = 1.96
+
+
+def design_matrix(month_numbers):
+    t = np.asarray(month_numbers, dtype=np.float64)
+    columns = [np.ones_like(t), (t - t[0]) / 12]
+    for k in range(1, HARMONICS + 1):
+        angle = 2 * np.pi * k * t / 12
+        columns += [np.cos(angle), np.sin(angle)]
+    return np.stack(columns, axis=1)
+
+# Monthly (entity x month) flights and delayed flights from the store's prefix sums
+def monthly_counts(store, by=None):
+    prefix = np.asarray(store.arrays[PREFIX_ARRAYS[by][0]])
+    monthly = np.diff(prefix, axis=0)
+    if by is None:
+        monthly = monthly[:, None, :]
+    monthly = np.moveaxis(monthly, 0, 1)
+    labels = store.dims[by] if by else ['All']
+    return labels, monthly[:, :, MEASURES.index('arr_flights')], monthly[:, :, MEASURES.index('arr_del15')]
+
+# The season after the last one whose 12 months are all in the store
+def get_forecast_season(store):
+    last_month = parse_month(store.months[-1])
+    end = last_month if last_month % 12 == 6 else last_month - (last_month - 6) % 12
+    start_year = end // 12
+    return end, f"{start_year}/{start_year + 1}"
+
+
+# Fit every series at once and project the next season.
+# Returns one row per entity: the projected delay % with a 95% interval, and the last full season.
+def fit_season_forecast(store, by=None):
+    labels, flights, delayed = monthly_counts(store, by)
+    first_month = parse_month(store.months[0])
+    fit_end, season = get_forecast_season(store)
+
+    # Fit window: the last FIT_MONTHS complete months
+    end_pos = fit_end - first_month + 1
+    start_pos = max(end_pos - FIT_MONTHS, 0)
+    flights, delayed = flights[:, start_pos:end_pos], delayed[:, start_pos:end_pos]
+    months = np.arange(first_month + start_pos, first_month + end_pos)
+    X = design_matrix(np.concatenate([months, fit_end + 1 + np.arange(12)]))
+    X_fit, X_next = X[:len(months)], X[len(months):]
+    n_params = X.shape[1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(flights >= MIN_FLIGHTS, flights, 0.0)
+        rate = np.where(weights > 0, delayed / flights, 0.0)
+
+        # Weighted normal equations for every series: (S x P x P) and (S x P)
+        xtwx = np.einsum('sm,mp,mq->spq', weights, X_fit, X_fit)
+        xtwy = np.einsum('sm,mp,sm->sp', weights, X_fit, rate)
+        observed = (weights > 0).sum(axis=1)
+        fitted = observed >= 2 * n_params
+        xtwx[~fitted] = np.eye(n_params)
+        xtwy[~fitted] = 0
+        beta = np.linalg.solve(xtwx, xtwy[:, :, None])[:, :, 0]
+
+        # Residual variance per flight, scaled back to a month of average traffic
+        residuals = rate - beta @ X_fit.T
+        total_weight = weights.sum(axis=1)
+        sigma2 = (weights * residuals ** 2).sum(axis=1) / np.maximum(observed - n_params, 1)
+        sigma2_month = sigma2 * observed / total_weight
+        covariance = np.linalg.inv(xtwx) * sigma2[:, None, None]
+
+        # Next season's months are weighted like the last full season's traffic
+        last_season = flights[:, -12:]
+        month_weights = last_season / last_season.sum(axis=1, keepdims=True)
+        a = month_weights @ X_next
+        projected = np.einsum('sp,sp->s', a, beta)
+        variance = np.einsum('sp,spq,sq->s', a, covariance, a) + sigma2_month * (month_weights ** 2).sum(axis=1)
+        margin = Z_95 * np.sqrt(variance)
+        last_pct = delayed[:, -12:].sum(axis=1) / last_season.sum(axis=1) * 100
+
+    result = pd.DataFrame({
+        'season': season,
+        'forecast_pct': projected * 100,
+        'lower_pct': (projected - margin) * 100,
+        'upper_pct': (projected + margin) * 100,
+        'last_season_pct': last_pct,
+        'months_fitted': observed,
+    }, index=pd.Index(labels, name=by or 'all'))
+    # Series without enough recent data (or no traffic last season) get no forecast
+    return result[fitted & np.isfinite(result['forecast_pct'].to_numpy())]
+
+@disk_cached('season_forecast')
+def get_season_forecast(store, by=None):
+    return fit_season_forecast(store, by)
+
+# Forecast rows to overlay on a season trend chart: only when the chart ends at the last full season
+def forecast_for_chart(store, last_shown_season, by=None, entities=None):
+    forecast = get_season_forecast(store, by)
+    start_year = int(get_forecast_season(store)[1].split('/')[0])
+    if last_shown_season != f"{start_year - 1}/{start_year}":
+        return forecast.iloc[:0]
+    if entities is not None:
+        forecast = forecast[forecast.index.isin(entities)]
+    return forecast
+
+# Dashed step from each line's last season to its projection, with the 95% interval as error bars.
+# `lines` maps a forecast index label to (legend name, last season, last value, color).
+def add_forecast_traces(fig, forecast, lines):
+    for label, (name, last_season, last_value, color) in lines.items():
+        if label not in forecast.index:
+            continue
+        row = forecast.loc[label]
+        fig.add_trace(go.Scatter(
+            x=[last_season, row['season']],
+            y=[last_value, row['forecast_pct']],
+            mode='lines',
+            line=dict(color=color, dash='dash'),
+            showlegend=False,
+            hoverinfo='skip',
+        ))
+        fig.add_trace(go.Scatter(
+            x=[row['season']],
+            y=[row['forecast_pct']],
+            mode='markers',
+            marker=dict(color=color, symbol='diamond-open', size=10),
+            error_y=dict(
+                type='data', symmetric=False, color=color,
+                array=[row['upper_pct'] - row['forecast_pct']],
+                arrayminus=[row['forecast_pct'] - row['lower_pct']],
+            ),
+            name=f"{name} (forecast)",
+            showlegend=False,
+            customdata=[[row['lower_pct'], row['upper_pct']]],
+            hovertemplate=(
+                f'Year: <b>%{{x}}</b> (forecast)<br>'
+                f'Delay Percentage: <b>%{{y:.2f}}%</b><br>'
+                f'95% Interval: <b>%{{customdata[0]:.2f}}% – %{{customdata[1]:.2f}}%</b><extra>{name}</extra>'
+            ),
+        ))
@@ -0,0 +1,45 @@
+from math import prod
+
+import numpy as np
+import pandas as pd
+
+# Integer codes per grouping column, with labels sorted like groupby output.
+# Rows with a missing key get -1 and are left out, as groupby does.
+def encode_groups(df, by):
+    codes, labels = [], []
+    for col in by:
+        col_codes, uniques = pd.factorize(df[col], sort=True)
+        codes.append(col_codes.astype(np.int64))
+        labels.append(list(uniques))
+    return codes, labels
+
+# Sum every measure for every combination of the `by` columns in one grouping pass:
+# the rows are encoded once into flat integer group codes, and each measure is reduced
+# against those same codes with np.bincount. Returns the labels per key and a dense
+# array shaped (len(labels[0]), ..., len(measures)), zero where a combination has no rows.
+def fused_group_sums(df, by, measures):
+    codes, labels = encode_groups(df, by)
+    shape = tuple(len(l) for l in labels)
+    size = prod(shape)
+
+    valid = np.ones(len(df), dtype=bool)
+    for col_codes in codes:
+        valid &= col_codes >= 0
+    flat = np.ravel_multi_index([col_codes[valid] for col_codes in codes], shape) if size else np.empty(0, np.int64)
+
+    values = np.nan_to_num(df[measures].to_numpy(dtype=np.float64)[valid])
+    sums = np.empty((size, len(measures)), dtype=np.float64)
+    for i in range(len(measures)):
+        sums[:, i] = np.bincount(flat, weights=values[:, i], minlength=size)
+    return labels, sums.reshape(shape + (len(measures),))
+
+# Dense fused output as a groupby-like DataFrame, one row per non-empty combination
+def fused_to_frame(labels, sums, by, measures, drop_empty=True):
+    if len(by) == 1:
+        index = pd.Index(labels[0], name=by[0])
+    else:
+        index = pd.MultiIndex.from_product(labels, names=by)
+    result = pd.DataFrame(sums.reshape(-1, len(measures)), index=index, columns=measures)
+    if drop_empty and 'arr_flights' in result.columns:
+        result = result[result['arr_flights'] > 0]
+    return result
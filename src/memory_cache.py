@@ -0,0 +1,168 @@
+import functools
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.utils import format_bytes
+
+# One in-process cache for every aggregate, row set and figure the dashboard keeps in memory,
+# with a single size budget shared by all of them. Entries are sized when stored and the
+# least recently used ones are dropped first once the budget is exceeded.
+MEMORY_CACHE_MAX_BYTES = int(float(os.environ.get('DASHBOARD_MEMORY_CACHE_MB', 256)) * 1024 * 1024)
+
+
+# Approximate footprint of a cached value
+def estimate_size(value, seen=None):
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v, seen) for v in value)
+
+    # Plain objects (e.g. the search index) are sized by their attributes
+    size = sys.getsizeof(value)
+    if hasattr(value, '__dict__'):
+        size += estimate_size(vars(value), seen)
+    slots = getattr(type(value), '__slots__', ())
+    for slot in [slots] if isinstance(slots, str) else slots:
+        if hasattr(value, slot):
+            size += estimate_size(getattr(value, slot), seen)
+    return size
+
+
+# Callers get their own copy of cached frames (as with st.cache_data) so they can add columns freely
+def copy_value(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+class MemoryCache:
+    def __init__(self, max_bytes=MEMORY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = {}
+        self.misses = {}
+        self.lock = threading.Lock()
+
+    # Keys are (name, version, params); the name groups entries for the usage report
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses[key[0]] = self.misses.get(key[0], 0) + 1
+                return None, False
+            self.entries.move_to_end(key)
+            self.hits[key[0]] = self.hits.get(key[0], 0) + 1
+            return copy_value(entry[0]), True
+
+    def set(self, key, value):
+        size = estimate_size(value)
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            # A value bigger than the whole budget is returned to the caller but not kept
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+
+    # Drop one dataset version, or everything except `keep_version` (unversioned entries included)
+    def clear(self, version=None, keep_version=None):
+        with self.lock:
+            for key in list(self.entries):
+                if version is not None and key[1] != version:
+                    continue
+                if keep_version is not None and key[1] == keep_version:
+                    continue
+                self.bytes -= self.entries.pop(key)[1]
+
+    def stats(self):
+        with self.lock:
+            names = {}
+            for (name, _, _), (_, size) in self.entries.items():
+                info = names.setdefault(name, {'entries': 0, 'bytes': 0})
+                info['entries'] += 1
+                info['bytes'] += size
+            for name in set(self.hits) | set(self.misses):
+                info = names.setdefault(name, {'entries': 0, 'bytes': 0})
+                info['hits'] = self.hits.get(name, 0)
+                info['misses'] = self.misses.get(name, 0)
+            return {
+                'max_bytes': self.max_bytes,
+                'bytes': self.bytes,
+                'entries': len(self.entries),
+                'names': names,
+            }
+
+
+memory_cache = MemoryCache()
+
+
+# Frames are keyed by content, like st.cache_data does
+def get_frame_key(value):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    digest.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode('utf-8'))
+    return ('frame', digest.hexdigest())
+
+# Hashable key for cached function arguments; `frame_key` decides what a DataFrame or Series becomes
+def make_key_part(value, frame_key=get_frame_key):
+    if hasattr(value, 'dataset_hash'):
+        return ('dataset', value.dataset_hash)
+    if isinstance(value, (list, tuple)):
+        return tuple(make_key_part(v, frame_key) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, make_key_part(v, frame_key)) for k, v in value.items()))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return frame_key(value)
+    return repr(value)
+
+# Cache a function's result in the shared memory budget.
+# `version` maps the first argument to a dataset version so a hot reload can drop old entries;
+# without it, the first argument's own dataset_hash is used when it has one.
+def memory_cached(name, version=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            source = args[0] if args else None
+            dataset_version = version(source) if version else getattr(source, 'dataset_hash', None)
+            key = (name, dataset_version, make_key_part((args, kwargs)))
+
+            value, hit = memory_cache.get(key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            memory_cache.set(key, value)
+            return copy_value(value)
+        return wrapper
+    return decorator
+
+
+def cache_usage_sidebar():
+    stats = memory_cache.stats()
+    with st.sidebar.expander(f"Cache: {format_bytes(stats['bytes'])} of {format_bytes(stats['max_bytes'])}"):
+        st.caption(f"{stats['entries']} entries in this process")
+        for name, info in sorted(stats['names'].items(), key=lambda item: -item[1]['bytes']):
+            st.caption(
+                f"**{name}**: {info['entries']} entries, {format_bytes(info['bytes'])}, "
+                f"{info.get('hits', 0)} hits / {info.get('misses', 0)} misses"
+            )
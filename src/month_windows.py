@@ -0,0 +1,82 @@
+import pandas as pd
+
+from src.aggregate_store import MEASURES
+
+# A window is (label, first month, last month), months written as 'YYYY-MM' and both ends inclusive.
+# All window sums come from the store's monthly prefix sums, so each window costs the same
+# whatever its length; the Aug–Jul airline year is just one kind of window.
+
+def parse_month(label):
+    year, month = label.split('-')
+    return int(year) * 12 + int(month) - 1
+
+def format_month(number):
+    return f"{number // 12}-{number % 12 + 1:02d}"
+
+# Quarter labels such as '2019-Q3' map to their first and last month
+def quarter_months(label):
+    year, quarter = label.split('-Q')
+    first = int(year) * 12 + (int(quarter) - 1) * 3
+    return format_month(first), format_month(first + 2)
+
+def airline_year_windows(store):
+    return [(season, f"{season[:4]}-08", f"{int(season[:4]) + 1}-07") for season in store.seasons]
+
+# Airline years whose whole Aug–Jul span is in the data; a trailing partial season is left out
+def complete_seasons(store):
+    return [season for season, start, end in airline_year_windows(store) if start >= store.months[0] and end <= store.months[-1]]
+
+def calendar_year_windows(store):
+    years = sorted({int(month[:4]) for month in store.months})
+    return [(str(year), f"{year}-01", f"{year}-12") for year in years]
+
+def rolling_windows(store, length=12):
+    numbers = [parse_month(month) for month in store.months]
+    return [
+        (format_month(end), format_month(end - length + 1), format_month(end))
+        for end in numbers[length - 1:]
+    ]
+
+def last_months_window(store, length):
+    end = parse_month(store.months[-1])
+    return (f"Last {length} months", format_month(end - length + 1), format_month(end))
+
+# Every quarter with at least one month in the data, e.g. '2013-Q3'
+def quarter_labels(store):
+    return list(dict.fromkeys(f"{month[:4]}-Q{(int(month[5:]) - 1) // 3 + 1}" for month in store.months))
+
+def quarter_range_window(first_quarter, last_quarter):
+    return (f"{first_quarter} – {last_quarter}", quarter_months(first_quarter)[0], quarter_months(last_quarter)[1])
+
+
+# Sums of every measure per window (and per carrier/state when `by` is given).
+# Windows are clipped to the months in the data; 'months' tells how many months each covers.
+def window_frame(store, windows, by=None, drop_empty=True):
+    first = parse_month(store.months[0])
+    last_position = len(store.months) - 1
+
+    labels, starts, ends, months = [], [], [], []
+    for label, start, end in windows:
+        start_position = max(parse_month(start) - first, 0)
+        end_position = min(parse_month(end) - first, last_position)
+        if start_position > end_position:
+            continue
+        labels.append(label)
+        starts.append(start_position)
+        ends.append(end_position)
+        months.append(end_position - start_position + 1)
+
+    sums = store.window_sums(starts, ends, by)
+    if by is None:
+        result = pd.DataFrame(sums, index=pd.Index(labels, name='window'), columns=MEASURES)
+        result['months'] = months
+    else:
+        entities = store.dims[by]
+        index = pd.MultiIndex.from_product([labels, entities], names=['window', by])
+        result = pd.DataFrame(sums.reshape(-1, len(MEASURES)), index=index, columns=MEASURES)
+        result['months'] = [m for m in months for _ in entities]
+
+    if drop_empty:
+        result = result[result['arr_flights'] > 0]
+    result['delay_pct'] = result['arr_del15'] / result['arr_flights'] * 100
+    return result
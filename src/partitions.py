@@ -0,0 +1,119 @@
+import os
+import re
+import shutil
+
+import pandas as pd
+
+from src.utils import get_airline_year_column, get_airline_year_months
+
+# Hive-style layout: <root>/year=2019/month=8/part-0.csv
+# A season range only touches the year/month folders it covers, and a new month is just a new folder.
+PARTITION_FILE = 'part-0.csv'
+PARTITION_PATTERN = re.compile(r'^year=(\d{4})$'), re.compile(r'^month=(\d{1,2})$')
+
+
+def get_partition_root(csv_path):
+    return os.path.splitext(csv_path)[0]
+
+# Use the partitioned store when it has been built, otherwise the flat csv file
+def resolve_dataset_path(csv_path):
+    root = get_partition_root(csv_path)
+    return root if os.path.isdir(root) else csv_path
+
+def get_partition_path(root, year, month):
+    return os.path.join(root, f"year={year}", f"month={month}", PARTITION_FILE)
+
+def list_partitions(root):
+    year_pattern, month_pattern = PARTITION_PATTERN
+    partitions = []
+    for year_dir in sorted(os.listdir(root)):
+        year_match = year_pattern.match(year_dir)
+        if not year_match:
+            continue
+        for month_dir in os.listdir(os.path.join(root, year_dir)):
+            month_match = month_pattern.match(month_dir)
+            path = os.path.join(root, year_dir, month_dir, PARTITION_FILE)
+            if month_match and os.path.exists(path):
+                partitions.append((int(year_match.group(1)), int(month_match.group(1)), path))
+    return sorted(partitions)
+
+# Files backing a dataset path, used for fingerprints and content hashes
+def get_dataset_files(path):
+    if os.path.isdir(path):
+        return [p for _, _, p in list_partitions(path)]
+    return [path]
+
+
+def read_partitions(root, selected_years=None):
+    partitions = list_partitions(root)
+
+    # Partition pruning: keep only the months covered by the selected airline years
+    if selected_years is not None:
+        wanted = {ym for season in selected_years for ym in get_airline_year_months(season)}
+        partitions = [p for p in partitions if (p[0], p[1]) in wanted]
+
+    if not partitions:
+        return pd.DataFrame()
+    df = pd.concat([pd.read_csv(path) for _, _, path in partitions], ignore_index=True)
+    df['airline_year'] = get_airline_year_column(df)
+    return df
+
+def read_dataset(path, selected_years=None):
+    if os.path.isdir(path):
+        return read_partitions(path, selected_years)
+    df = pd.read_csv(path)
+    df['airline_year'] = get_airline_year_column(df)
+    if selected_years is not None:
+        df = df[df['airline_year'].isin(selected_years)]
+    return df
+
+
+def write_partition(root, year, month, df):
+    path = get_partition_path(root, year, month)
+    partition_dir = os.path.dirname(path)
+    os.makedirs(partition_dir, exist_ok=True)
+
+    # Write next to the final file and rename so readers never see half a partition
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.drop(columns=['airline_year'], errors='ignore').to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+# Also used to ingest a new processed file: its months are added (or replaced) as partitions
+def write_partitions(df, root):
+    written = []
+    for (year, month), month_df in df.groupby(['year', 'month']):
+        written.append(write_partition(root, int(year), int(month), month_df))
+    return written
+
+def build_partitions_from_csv(csv_path, root=None):
+    root = root or get_partition_root(csv_path)
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    write_partitions(pd.read_csv(csv_path), root)
+    return root
+
+
+if __name__ == '__main__':
+    import argparse
+
+    default_csv = os.path.join('src', 'dataset', 'Airline_Delay_Cause_Data_Processing.csv')
+    parser = argparse.ArgumentParser(description='Manage the year/month partitioned dataset.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='split the flat processed csv into partitions')
+    build_parser.add_argument('csv', nargs='?', default=default_csv)
+    add_parser = subparsers.add_parser('add', help='ingest a processed csv with new months')
+    add_parser.add_argument('csv')
+    add_parser.add_argument('--root', default=get_partition_root(default_csv))
+    subparsers.add_parser('list', help='list partitions').add_argument('--root', default=get_partition_root(default_csv))
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        root = build_partitions_from_csv(args.csv)
+        print(f"Wrote {len(list_partitions(root))} partitions to {root}")
+    elif args.command == 'add':
+        for path in write_partitions(pd.read_csv(args.csv), args.root):
+            print(f"Wrote {path}")
+    elif args.command == 'list':
+        for year, month, path in list_partitions(args.root):
+            print(f"{year}-{month:02d}  {path}")
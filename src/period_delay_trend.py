@@ -0,0 +1,127 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+from src.delay_causes import DELAY_CAUSES, cause_mix
+from src.month_windows import (
+    airline_year_windows, calendar_year_windows, last_months_window, quarter_labels, quarter_range_window,
+    rolling_windows, window_frame
+)
+from src.startup import lazy_import
+from src.utils import format_with_dots
+
+px = lazy_import('plotly.express')
+
+PERIOD_VIEWS = ['Airline Year (Aug–Jul)', 'Calendar Year', 'Rolling 12 Months', 'Quarter Range', 'Custom Month Range']
+
+## Graph 4: Tren Keterlambatan Penerbangan per Periode (month windows)
+def period_delay_trend(store):
+    st.markdown("<h2 style='font-size: 24px;'>Flight Delays by Custom Period</h2>", unsafe_allow_html=True)
+
+    view = st.radio("Period view", PERIOD_VIEWS, horizontal=True)
+
+    if view == 'Custom Month Range':
+        months = store.months
+        _, default_start, default_end = last_months_window(store, 18)
+        start, end = st.select_slider(
+            "Select month range",
+            options=months,
+            value=(max(default_start, months[0]), default_end),
+        )
+        custom_period_breakdown(store, start, end)
+        return
+
+    # Quarters at the edges of the data may be partial; the window is clipped to the months present
+    if view == 'Quarter Range':
+        quarters = quarter_labels(store)
+        first_quarter, last_quarter = st.select_slider(
+            "Select quarter range",
+            options=quarters,
+            value=(quarters[max(len(quarters) - 6, 0)], quarters[-1]),
+        )
+        label, start, end = quarter_range_window(first_quarter, last_quarter)
+        custom_period_breakdown(store, start, end, label)
+        return
+
+    if view == 'Airline Year (Aug–Jul)':
+        windows = airline_year_windows(store)
+    elif view == 'Calendar Year':
+        windows = calendar_year_windows(store)
+    else:
+        windows = rolling_windows(store, 12)
+
+    # Partial windows at the edges of the data are left out of the trend
+    periods = window_frame(store, windows)
+    periods = periods[periods['months'] == 12].reset_index()
+
+    if periods.empty:
+        st.warning("Not enough months available for this view.")
+        return
+
+    periods['hover_pct'] = periods['delay_pct'].map(lambda x: f"{x:.2f}%")
+    periods['hover_flights'] = periods['arr_flights'].apply(format_with_dots)
+
+    fig = px.line(
+        periods,
+        x='window',
+        y='delay_pct',
+        markers=view != 'Rolling 12 Months',
+        custom_data=['hover_pct', 'hover_flights'],
+        height=350
+    )
+    fig.update_traces(
+        hovertemplate=
+            'Period: <b>%{x}</b><br>'
+            'Delay Percentage: <b>%{customdata[0]}</b><br>'
+            'Total Flights: <b>%{customdata[1]}</b><extra></extra>'
+    )
+    fig.update_layout(
+        xaxis_title="Period" if view != 'Rolling 12 Months' else "12 months ending",
+        yaxis_title="Percentage of Flight Delays (%)",
+        margin=dict(t=20, b=40, l=40, r=20),
+        showlegend=False,
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def custom_period_breakdown(store, start, end, label=None):
+    period = window_frame(store, [(label or f"{start} – {end}", start, end)], drop_empty=False).iloc[0]
+
+    if period['arr_flights'] == 0:
+        st.warning("No data available for the selected month range.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Percentage of Flight Delays", f"{period['delay_pct']:.2f}%")
+    col2.metric("Total Flight Delays", format_with_dots(period['arr_del15']))
+    col3.metric("Total Overall Flights", format_with_dots(period['arr_flights']))
+
+    mix = cause_mix(period.to_frame().T).iloc[0]
+
+    bar_fig = go.Figure()
+    for cause in DELAY_CAUSES:
+        pct = mix[cause.count_col]
+        bar_fig.add_trace(go.Bar(
+            y=[period.name],
+            x=[pct],
+            name=cause.label,
+            orientation='h',
+            marker_color=cause.color,
+            text=[f'<b>{cause.label}</b><br>{pct:.2f}%'],
+            textposition='inside',
+            insidetextanchor='middle',
+            meta=cause.label,
+            hovertemplate=(
+                '<b>%{meta}</b><br>'
+                'Delay Percentage: <b>%{x:.2f}%</b><extra></extra>'
+            ),
+        ))
+
+    bar_fig.update_layout(
+        barmode='stack',
+        title=dict(text=f"Delay Cause Proportions ({period.name})", font=dict(size=12)),
+        xaxis=dict(title='Percentage', range=[0, 100], ticksuffix='%'),
+        yaxis=dict(title='', showticklabels=False),
+        height=150,
+        showlegend=False,
+        margin=dict(t=30, l=20, r=20, b=0),
+    )
+    st.plotly_chart(bar_fig, use_container_width=True)
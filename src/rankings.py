@@ -0,0 +1,88 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from src.aggregate_store import MEASURES, SEASON_ARRAYS
+from src.delay_causes import DELAY_CAUSES
+
+# Ratio metrics that rankings can sort by, as numerator / denominator of additive store measures.
+# Percentages scale by 100; severity metrics are minutes per delayed flight, in total and by cause.
+RankingMetric = namedtuple('RankingMetric', ['key', 'label', 'numerator', 'denominator', 'scale', 'unit'], defaults=[100, '%'])
+
+RANKING_METRICS = [
+    RankingMetric('delay_pct', 'Delay %', 'arr_del15', 'arr_flights'),
+    RankingMetric('cancelled_pct', 'Cancellation %', 'arr_cancelled', 'arr_flights'),
+    RankingMetric('diverted_pct', 'Diversion %', 'arr_diverted', 'arr_flights'),
+] + [
+    RankingMetric(f"{cause.key}_pct", f"{cause.label} Delay %", cause.count_col, 'arr_flights')
+    for cause in DELAY_CAUSES
+] + [
+    RankingMetric('delay_minutes', 'Minutes per Delayed Flight', 'arr_delay', 'arr_del15', 1, ' min'),
+] + [
+    RankingMetric(f"{cause.key}_minutes", f"{cause.label} Minutes per Delayed Flight", cause.minute_col, 'arr_del15', 1, ' min')
+    for cause in DELAY_CAUSES
+]
+
+METRICS_BY_KEY = {metric.key: metric for metric in RANKING_METRICS}
+
+
+# Entity x measure sums for the selected seasons, from the precomputed season x entity arrays.
+# Extra filters (e.g. state= for carriers) fall back to the season x carrier x state cube.
+def entity_sums(store, entity, selected_years, **filters):
+    filters = {dim: labels for dim, labels in filters.items() if labels is not None}
+    if filters:
+        frame = store.aggregate(keep=(entity,), drop_empty=False, season=selected_years, **filters)
+        return frame.index.tolist(), frame.to_numpy()
+
+    season_sums = store.arrays[SEASON_ARRAYS[entity][0]]
+    if selected_years is not None:
+        season_sums = np.take(season_sums, store.positions('season', selected_years), axis=0)
+    return store.dims[entity], season_sums.sum(axis=0)
+
+# Metric value per entity; entities without flights (and the '' unknown state) are left out
+def entity_metric(store, entity, metric='delay_pct', selected_years=None, min_flights=0, **filters):
+    metric = METRICS_BY_KEY[metric]
+    labels, sums = entity_sums(store, entity, selected_years, **filters)
+    numerator = sums[:, MEASURES.index(metric.numerator)]
+    denominator = sums[:, MEASURES.index(metric.denominator)]
+
+    keep = (sums[:, MEASURES.index('arr_flights')] > max(min_flights, 0)) & (denominator > 0)
+    keep &= np.array([label != '' for label in labels], dtype=bool)
+    values = numerator[keep] / denominator[keep] * metric.scale
+    return pd.Series(values, index=pd.Index(np.asarray(labels, dtype=object)[keep], name=entity), name=metric.key)
+
+# The k largest (or smallest) values in order, via a partial sort: O(n + k log k) instead of a full sort
+def top_k(values, k, largest=True):
+    k = min(k, len(values))
+    if k <= 0:
+        return values.iloc[:0]
+    keyed = -values.to_numpy() if largest else values.to_numpy()
+    candidates = np.argpartition(keyed, k - 1)[:k]
+    return values.iloc[candidates[np.argsort(keyed[candidates], kind='stable')]]
+
+# Top-k ranking table for any entity, metric and season range, with the flights behind each value
+def rank_entities(store, entity, metric='delay_pct', selected_years=None, k=10, largest=True, min_flights=0, **filters):
+    values = entity_metric(store, entity, metric, selected_years, min_flights, **filters)
+    ranked = top_k(values, k, largest).to_frame()
+
+    labels, sums = entity_sums(store, entity, selected_years, **filters)
+    position = {label: i for i, label in enumerate(labels)}
+    rows = [position[label] for label in ranked.index]
+    spec = METRICS_BY_KEY[metric]
+    for col in dict.fromkeys([spec.numerator, spec.denominator, 'arr_flights']):
+        ranked[col] = sums[rows, MEASURES.index(col)]
+
+    if entity in store.labels:
+        names = dict(zip(store.dims[entity], store.labels[entity]))
+        ranked['label'] = [names.get(label, label) for label in ranked.index]
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    return ranked
+
+# Highest and lowest entity for a metric, as (label, value) pairs
+def extremes(store, entity, metric='delay_pct', selected_years=None, **filters):
+    values = entity_metric(store, entity, metric, selected_years, **filters)
+    if values.empty:
+        return None, None
+    highest, lowest = top_k(values, 1), top_k(values, 1, largest=False)
+    return (highest.index[0], highest.iloc[0]), (lowest.index[0], lowest.iloc[0])
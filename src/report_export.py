@@ -0,0 +1,218 @@
+import argparse
+import html
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations_with_replacement
+
+import plotly.io as pio
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Block
+
+from src.aggregate_store import open_aggregate_store
+from src.month_windows import complete_seasons
+from src.partitions import resolve_dataset_path
+from src.state_utils import state_abbrev_to_name
+
+# Static snapshots of the dashboard pages for people who don't use the live app.
+# Each report runs the real page script headlessly (Streamlit's AppTest) with the year slider
+# and comparison pickers set, then writes what it rendered to a standalone HTML file.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_CSV = os.path.join(BASE_DIR, 'src', 'dataset', 'Airline_Delay_Cause_Data_Processing.csv')
+
+REPORT_PAGES = {
+    'trend': 'Delay_Cause_Trend_Analysis.py',
+    'carrier': os.path.join('pages', 'Carrier_Delay_Analysis.py'),
+    'state': os.path.join('pages', 'State_Delay_Analysis.py'),
+    'leaderboard': os.path.join('pages', 'Delay_Leaderboard.py'),
+    'anomalies': os.path.join('pages', 'Delay_Anomalies.py'),
+    'seasonality': os.path.join('pages', 'Delay_Seasonality.py'),
+}
+
+# Comparison picker on each page that takes an entity pair
+PAIR_PICKERS = {
+    'carrier': 'Select 2 Carriers to Compare',
+    'state': 'Select 2 States to Compare',
+}
+STATE_CODES = {name: code for code, name in state_abbrev_to_name.items()}
+
+ReportJob = namedtuple('ReportJob', ['page', 'start_year', 'end_year', 'pair'])
+
+
+# Year ranges are given by end year, like the slider (2014 = 2013/2014), over the same complete seasons
+def get_year_bounds(store):
+    seasons = complete_seasons(store)
+    return int(seasons[0][-4:]), int(seasons[-1][-4:])
+
+def all_year_ranges(first_year, last_year):
+    return list(combinations_with_replacement(range(first_year, last_year + 1), 2))
+
+# Only the syntax is checked here; the bounds come from the store once it is open
+def parse_year_range(text):
+    start, _, end = text.partition('-')
+    try:
+        start, end = int(start), int(end or start)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an end-year range like 2019-2023: {text}")
+    if start > end:
+        raise argparse.ArgumentTypeError(f"year range must not end before it starts: {text}")
+    return start, end
+
+def parse_pair(text):
+    pair = tuple(part.strip() for part in text.split('|'))
+    if len(pair) != 2:
+        raise argparse.ArgumentTypeError(f"expected two names separated by '|': {text}")
+    return pair
+
+def build_jobs(pages, year_ranges, carrier_pairs=(), state_pairs=()):
+    pairs = {'carrier': list(carrier_pairs) or [None], 'state': list(state_pairs) or [None]}
+    return [
+        ReportJob(page, start, end, pair)
+        for start, end in year_ranges
+        for page in pages
+        for pair in pairs.get(page, [None])
+    ]
+
+def get_report_name(job):
+    name = f"{job.page}_{job.start_year}-{job.end_year}"
+    if job.pair:
+        name += '_' + '_vs_'.join(''.join(c if c.isalnum() else '-' for c in entity) for entity in job.pair)
+    return name + '.html'
+
+
+# Walk the rendered element tree in page order and turn each element into an HTML fragment
+def render_element(node, plotlyjs):
+    kind = getattr(node, 'type', None)
+    if isinstance(node, Block):
+        inner = ''.join(render_element(child, plotlyjs) for child in node.children.values())
+        if kind == 'column':
+            return f"<div class='column'>{inner}</div>"
+        if any(getattr(child, 'type', None) == 'column' for child in node.children.values()):
+            return f"<div class='columns'>{inner}</div>"
+        return inner
+    if kind == 'markdown':
+        return f"<div class='markdown'>{node.value}</div>" if node.value else ''
+    if kind == 'metric':
+        delta = f"<div class='delta'>{html.escape(str(node.delta))}</div>" if node.delta else ''
+        return f"<div class='metric'><div class='label'>{html.escape(node.label)}</div><div class='value'>{html.escape(str(node.value))}</div>{delta}</div>"
+    if kind in ('warning', 'info', 'error', 'success'):
+        return f"<div class='alert {kind}'>{html.escape(node.value)}</div>"
+    if kind == 'dataframe':
+        return node.value.to_html(index=False, classes='table', border=0)
+    if kind == 'plotly_chart':
+        fig = pio.from_json(node.proto.spec, skip_invalid=True)
+        include = plotlyjs.pop() if plotlyjs else False
+        return pio.to_html(fig, full_html=False, include_plotlyjs=include)
+    # Interactive widgets have no meaning in a static report
+    return ''
+
+REPORT_STYLE = """
+body { font-family: 'Segoe UI', sans-serif; background: #0e1117; color: #fafafa; margin: 24px 48px; }
+.columns { display: flex; gap: 32px; }
+.column { flex: 1; min-width: 0; }
+.metric .label { font-size: 15px; }
+.metric .value { font-size: 2em; font-weight: bold; }
+.alert { padding: 12px 16px; border-radius: 6px; margin: 8px 0; background: #1c2a3a; }
+.alert.warning { background: #3a3216; }
+.table { border-collapse: collapse; width: 100%; }
+.table th, .table td { padding: 4px 8px; border-bottom: 1px solid #333; text-align: left; }
+"""
+
+def render_report(at, title, include_plotlyjs):
+    body = render_element(at.main, [include_plotlyjs])
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+        f"<style>{REPORT_STYLE}</style></head><body>{body}</body></html>"
+    )
+
+
+# Runs one page with the job's year range and entity pair. The aggregate store is a
+# cache_resource, so every report rendered in the same worker process reuses one loaded dataset.
+def run_page(job, timeout=120):
+    at = AppTest.from_file(os.path.join(BASE_DIR, REPORT_PAGES[job.page]), default_timeout=timeout)
+    at.run()
+    at.slider[0].set_value((job.start_year, job.end_year)).run()
+    if job.pair:
+        picker = next((m for m in at.multiselect if m.label == PAIR_PICKERS[job.page]), None)
+        if picker is None:
+            raise ValueError(f"{job.page} page has no comparison picker")
+        # Pickers hold keys (carrier names, state codes) and show longer labels; states may be given by name
+        values = [STATE_CODES.get(entity, entity) for entity in job.pair] if job.page == 'state' else list(job.pair)
+        unknown = [entity for entity, value in zip(job.pair, values) if picker.format_func(value) not in picker.options]
+        if unknown:
+            raise ValueError(f"not available for {job.start_year}-{job.end_year}: {', '.join(unknown)}")
+        picker.set_value(values).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+def export_report(job, out_dir, include_plotlyjs='cdn'):
+    at = run_page(job)
+    title = f"{job.page.title()} report {job.start_year - 1}/{job.start_year} - {job.end_year - 1}/{job.end_year}"
+    path = os.path.join(out_dir, get_report_name(job))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_report(at, title, include_plotlyjs))
+    return path
+
+def write_index(out_dir, paths):
+    links = ''.join(
+        f"<li><a href='{html.escape(os.path.basename(path))}'>{html.escape(os.path.basename(path))}</a></li>"
+        for path in sorted(paths)
+    )
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Delay reports</title><style>{REPORT_STYLE}</style></head><body><h1>Delay reports</h1><ul>{links}</ul></body></html>")
+
+
+def export_reports(jobs, out_dir, workers=None, include_plotlyjs='cdn'):
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Build the shared store once up front instead of having every worker wait on the lock
+    open_aggregate_store(resolve_dataset_path(DATASET_CSV))
+
+    written, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(export_report, job, out_dir, include_plotlyjs): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                written.append(future.result())
+                print(f"[{len(written) + len(failed)}/{len(jobs)}] {os.path.basename(written[-1])}")
+            except Exception as e:
+                failed.append((job, e))
+                print(f"[{len(written) + len(failed)}/{len(jobs)}] failed {get_report_name(job)}: {e}")
+
+    write_index(out_dir, written)
+    return written, failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render dashboard pages into standalone HTML reports.')
+    parser.add_argument('--pages', default='trend,carrier,state', help=f"comma separated, from: {', '.join(REPORT_PAGES)}")
+    parser.add_argument('--years', type=parse_year_range, action='append',
+                        help='end-year range like 2019-2023 (repeatable); default is every range the sliders offer')
+    parser.add_argument('--carrier-pair', type=parse_pair, action='append', default=[], help="'Carrier A|Carrier B' (repeatable)")
+    parser.add_argument('--state-pair', type=parse_pair, action='append', default=[], help="'State A|State B' (repeatable)")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--out', default=os.path.join(BASE_DIR, 'reports'))
+    parser.add_argument('--inline-plotlyjs', action='store_true', help='embed plotly.js so reports work offline')
+    args = parser.parse_args()
+
+    pages = [page.strip() for page in args.pages.split(',') if page.strip()]
+    unknown = [page for page in pages if page not in REPORT_PAGES]
+    if unknown:
+        parser.error(f"unknown pages: {', '.join(unknown)}")
+
+    first_year, last_year = get_year_bounds(open_aggregate_store(resolve_dataset_path(DATASET_CSV)))
+    outside = [f"{start}-{end}" for start, end in args.years or [] if start < first_year or end > last_year]
+    if outside:
+        parser.error(f"year range must be within {first_year}-{last_year}: {', '.join(outside)}")
+
+    # AppTest swaps out __main__ while a page runs, so workers must find the job functions
+    # under the module's import name rather than as __main__ attributes
+    from src import report_export
+
+    jobs = report_export.build_jobs(pages, args.years or all_year_ranges(first_year, last_year), args.carrier_pair, args.state_pair)
+    started = time.perf_counter()
+    written, failed = report_export.export_reports(jobs, args.out, args.workers, True if args.inline_plotlyjs else 'cdn')
+    print(f"{len(written)} reports written to {args.out} in {time.perf_counter() - started:.1f}s, {len(failed)} failed")
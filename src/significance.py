@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.aggregate_store import get_dataset_version, read_rows
+from src.memory_cache import memory_cached
+
+# Is the gap in delay % between two carriers (or states) real? Each season's monthly
+# carrier x airport records are resampled with replacement; the delay % of a replicate is
+# its delayed flights over its flights. All replicates of all seasons and both entities are
+# drawn as one index array, in batches that keep it under MAX_DRAWS elements.
+BOOTSTRAP_REPLICATES = 2000
+MAX_DRAWS = 4_000_000
+ALL_SEASONS = 'All selected'
+
+
+# Rows of the selected years only; the cache budget bounds how many year ranges stay in memory
+@memory_cached('prepared_rows', version=get_dataset_version)
+def load_and_prepare_data(path, selected_years=None):
+    return read_rows(path, selected_years)
+
+# Resampled (replicates x groups) flight and delayed sums; records must be sorted by group
+def bootstrap_group_sums(flights, delayed, group_starts, group_sizes, replicates, seed=0):
+    rng = np.random.default_rng(seed)
+    record_starts = np.repeat(group_starts, group_sizes).astype(np.int32)
+    record_sizes = np.repeat(group_sizes, group_sizes).astype(np.float64)
+    batch = max(1, MAX_DRAWS // max(len(flights), 1))
+
+    flight_sums = np.empty((replicates, len(group_starts)))
+    delayed_sums = np.empty((replicates, len(group_starts)))
+    for start in range(0, replicates, batch):
+        size = min(batch, replicates - start)
+        # Every draw picks a record of its own group: group start + floor(u * group size)
+        draws = rng.random((size, len(flights)))
+        draws *= record_sizes
+        draws = draws.astype(np.int32)
+        draws += record_starts
+        flight_sums[start:start + size] = np.add.reduceat(flights[draws], group_starts, axis=1)
+        delayed_sums[start:start + size] = np.add.reduceat(delayed[draws], group_starts, axis=1)
+    return flight_sums, delayed_sums
+
+# Two-sided percentile bootstrap p-value for "no gap"
+def bootstrap_p_value(gaps):
+    below = (gaps <= 0).sum(axis=0)
+    above = (gaps >= 0).sum(axis=0)
+    return np.minimum(1.0, 2 * (np.minimum(below, above) + 1) / (len(gaps) + 1))
+
+
+# Gap in delay % (first entity minus second) per season and over all selected seasons,
+# with a 95% bootstrap interval and p-value. `entity_col` is 'carrier_name' or 'airport_state'.
+@memory_cached('bootstrap_gap', version=get_dataset_version)
+def bootstrap_gap(dataset_path, entity_col, entities, selected_years, state=None, replicates=BOOTSTRAP_REPLICATES):
+    df = load_and_prepare_data(dataset_path, selected_years)
+    rows = df[df[entity_col].isin(entities) & (df['arr_flights'] > 0)]
+    if state:
+        rows = rows[rows['airport_state'] == state]
+
+    # Only seasons where both entities flew can be compared
+    present = rows.groupby('airline_year')[entity_col].nunique()
+    seasons = [season for season in selected_years if present.get(season, 0) == 2]
+    rows = rows[rows['airline_year'].isin(seasons)]
+    if rows.empty:
+        return pd.DataFrame(columns=['delay_pct_a', 'delay_pct_b', 'gap_pp', 'lower_pp', 'upper_pp', 'p_value'])
+
+    # Groups are (season, entity) in a fixed order: season-major, first entity then second
+    season_pos = rows['airline_year'].map({season: i for i, season in enumerate(seasons)}).to_numpy()
+    entity_pos = (rows[entity_col] == entities[1]).to_numpy().astype(np.int64)
+    group = season_pos * 2 + entity_pos
+    order = np.argsort(group, kind='stable')
+    group_sizes = np.bincount(group, minlength=len(seasons) * 2)
+    group_starts = np.concatenate([[0], np.cumsum(group_sizes)[:-1]])
+
+    flights = rows['arr_flights'].to_numpy(dtype=np.float64)[order]
+    delayed = rows['arr_del15'].to_numpy(dtype=np.float64)[order]
+    flight_sums, delayed_sums = bootstrap_group_sums(flights, delayed, group_starts, group_sizes, replicates)
+
+    # (replicates x season x entity), plus the whole range as one more "season"
+    flight_sums = flight_sums.reshape(replicates, len(seasons), 2)
+    delayed_sums = delayed_sums.reshape(replicates, len(seasons), 2)
+    flight_sums = np.concatenate([flight_sums, flight_sums.sum(axis=1, keepdims=True)], axis=1)
+    delayed_sums = np.concatenate([delayed_sums, delayed_sums.sum(axis=1, keepdims=True)], axis=1)
+    rates = delayed_sums / flight_sums * 100
+    gaps = rates[:, :, 0] - rates[:, :, 1]
+
+    observed_flights = np.add.reduceat(flights, group_starts).reshape(len(seasons), 2)
+    observed_delayed = np.add.reduceat(delayed, group_starts).reshape(len(seasons), 2)
+    observed_flights = np.vstack([observed_flights, observed_flights.sum(axis=0)])
+    observed_delayed = np.vstack([observed_delayed, observed_delayed.sum(axis=0)])
+    observed = observed_delayed / observed_flights * 100
+
+    lower, upper = np.percentile(gaps, [2.5, 97.5], axis=0)
+    return pd.DataFrame({
+        'delay_pct_a': observed[:, 0],
+        'delay_pct_b': observed[:, 1],
+        'gap_pp': observed[:, 0] - observed[:, 1],
+        'lower_pp': lower,
+        'upper_pp': upper,
+        'p_value': bootstrap_p_value(gaps),
+    }, index=pd.Index(seasons + [ALL_SEASONS], name='airline_year'))
+
+
+# Table under a two-entity trend chart
+def significance_table(result, names):
+    if result.empty:
+        return
+    table = pd.DataFrame({
+        'Year': result.index,
+        f'{names[0]} (%)': result['delay_pct_a'].round(2).to_numpy(),
+        f'{names[1]} (%)': result['delay_pct_b'].round(2).to_numpy(),
+        'Gap (pp)': result['gap_pp'].round(2).to_numpy(),
+        '95% Interval (pp)': [f"{lower:.2f} to {upper:.2f}" for lower, upper in zip(result['lower_pp'], result['upper_pp'])],
+        'p-value': result['p_value'].map(lambda p: f"{p:.3f}").to_numpy(),
+        'Significant': np.where(result['p_value'] < 0.05, '✓', '').tolist(),
+    })
+    with st.expander("Is the difference significant?"):
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        st.caption(
+            f"Gap = {names[0]} minus {names[1]}, in percentage points of delayed flights. Intervals and p-values come from "
+            f"{BOOTSTRAP_REPLICATES:,} bootstrap resamples of the monthly airport records behind each year; "
+            f"'{ALL_SEASONS}' pools the years in which both flew."
+        )
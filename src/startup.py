@@ -0,0 +1,189 @@
+import argparse
+import ast
+import contextlib
+import importlib
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import streamlit as st
+
+# Cold start bookkeeping: how long this process took to get its aggregate store mapped, a ready file
+# for readiness probes, and a per-module import-time breakdown of every page's startup path.
+# Only a process started with DASHBOARD_READY_FILE set writes the ready file (report workers and the
+# JSON API load stores too). The file names its process, so a file left by an earlier run is not "ready".
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_FILE = os.environ.get('DASHBOARD_READY_FILE')
+MAIN_PAGE = os.path.join(BASE_DIR, 'Delay_Cause_Trend_Analysis.py')
+PAGES_DIR = os.path.join(BASE_DIR, 'pages')
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)\s*$')
+
+logger = logging.getLogger(__name__)
+
+
+# Wall clock time a process was started, from /proc when available (so interpreter start-up counts too)
+def read_process_start(pid='self'):
+    with open(f'/proc/{pid}/stat') as f:
+        started_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+    with open('/proc/uptime') as f:
+        uptime = float(f.read().split()[0])
+    return time.time() - (uptime - started_ticks / os.sysconf('SC_CLK_TCK'))
+
+def get_process_start():
+    try:
+        return read_process_start()
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+PROCESS_STARTED = get_process_start()
+ready_info = {}
+ready_lock = threading.Lock()
+
+
+# Module proxy that imports on first attribute access, for libraries only needed once a chart renders
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+def lazy_import(name):
+    return sys.modules.get(name) or LazyModule(name)
+
+
+# Record the first time a store is usable in this process, and write the ready file if one is configured
+def mark_ready(store):
+    with ready_lock:
+        if ready_info:
+            return
+        ready_info.update({
+            'pid': os.getpid(),
+            'process_started': round(PROCESS_STARTED, 2),
+            'dataset_version': store.dataset_hash,
+            'seconds_to_ready': round(time.time() - PROCESS_STARTED, 3),
+            'ready_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        })
+    if not READY_FILE:
+        return
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(READY_FILE)), exist_ok=True)
+        tmp_path = f"{READY_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(ready_info, f)
+        os.replace(tmp_path, READY_FILE)
+    except OSError as e:
+        logger.warning("Could not write ready file %s: %s", READY_FILE, e)
+
+# A ready file only counts while the process that wrote it is still running: same pid and same start
+# time (pids get reused), so a file surviving a restart or crash reads as not ready
+def is_ready(path):
+    try:
+        with open(path) as f:
+            info = json.load(f)
+        return abs(read_process_start(info['pid']) - info['process_started']) < 1
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        return False
+
+# Sidebar status around the store load: "loading" while it maps (or builds), then how long start-up took
+@contextlib.contextmanager
+def readiness_status():
+    status = st.sidebar.empty()
+    if not ready_info:
+        status.caption("⏳ Loading data store…")
+    yield
+    if ready_info:
+        status.caption(f"✅ Data store ready ({ready_info['dataset_version'][:12]}), {ready_info['seconds_to_ready']:.1f}s after start")
+    else:
+        status.empty()
+
+
+# Modules a script imports at the top level; imports deferred into blocks don't count toward start-up
+def get_startup_imports(script_path):
+    with open(script_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+# (module, self us, cumulative us, depth) for every module a fresh interpreter loads to import `modules`
+def measure_imports(modules):
+    code = '; '.join(f'import {module}' for module in modules)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BASE_DIR, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            timings.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return timings
+
+# Self time summed per top-level package, with this repo's modules listed one by one
+def summarize_imports(timings):
+    totals = {}
+    for name, self_us, _, _ in timings:
+        key = name if name.startswith('src.') else name.split('.')[0]
+        totals[key] = totals.get(key, 0) + self_us
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+def print_import_report(top):
+    scripts = [MAIN_PAGE] + sorted(
+        os.path.join(PAGES_DIR, name) for name in os.listdir(PAGES_DIR) if name.endswith('.py')
+    )
+    for script in scripts:
+        modules = get_startup_imports(script)
+        breakdown = summarize_imports(measure_imports(modules))
+        total_ms = sum(us for _, us in breakdown) / 1000
+        print(f"{os.path.basename(script)}: {total_ms:.0f} ms to import {len(modules)} modules")
+        for name, us in breakdown[:top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+# Build the store ahead of the first session (e.g. before `streamlit run`), so the app only has to map it
+def warm(dataset_path):
+    from src.aggregate_store import open_aggregate_store
+    from src.partitions import resolve_dataset_path
+
+    store = open_aggregate_store(resolve_dataset_path(dataset_path))
+    print(f"{store.path} ready after {time.time() - PROCESS_STARTED:.2f}s ({store.dataset_hash[:12]})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Start-up timing for the dashboard.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    imports_parser = commands.add_parser('imports', help='per-module import time of every page')
+    imports_parser.add_argument('--top', type=int, default=12, help='modules listed per page')
+    warm_parser = commands.add_parser('warm', help='build the aggregate store before the app starts')
+    warm_parser.add_argument(
+        '--dataset',
+        default=os.path.join(BASE_DIR, 'src', 'dataset', 'Airline_Delay_Cause_Data_Processing.csv'),
+        help='processed csv or its partition folder',
+    )
+    check_parser = commands.add_parser('check', help='exit 0 if the ready file belongs to a running process (readiness probe)')
+    check_parser.add_argument('--ready-file', default=READY_FILE, help='defaults to $DASHBOARD_READY_FILE')
+    args = parser.parse_args()
+
+    if args.command == 'imports':
+        print_import_report(args.top)
+    elif args.command == 'warm':
+        warm(args.dataset)
+    else:
+        if not args.ready_file:
+            parser.error('no ready file: set DASHBOARD_READY_FILE or pass --ready-file')
+        sys.exit(0 if is_ready(args.ready_file) else 1)
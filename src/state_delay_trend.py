@@ -1,78 +1,98 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-from src.utils import format_with_dots, get_airline_year, normalize_airline_year
+from src.carrier_delay_trend import CAUSE_BREAKDOWNS, build_cause_breakdown_figure
+from src.entity_search import entity_picker, get_search_index
+from src.forecast import add_forecast_traces, forecast_for_chart
+from src.rankings import entity_metric, top_k
+from src.significance import bootstrap_gap, significance_table
+from src.startup import lazy_import
 from src.state_utils import state_abbrev_to_name
 
-def state_delay_trend_and_cause(df, selected_years):
-    df = df.copy()
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    df = df[df['airline_year'].isin(selected_years)]
-
-    # Map full state name
-    df['state_full'] = df['airport_state'].map(state_abbrev_to_name)
-    df = df[df['state_full'].notnull()]
-
-    # Compute average delay per state
-    state_avg_delay = df.groupby('state_full')['arr_del15_percentage'].mean().reset_index()
-
-    # Identify states with highest and lowest delay
-    highest_state = state_avg_delay.loc[state_avg_delay['arr_del15_percentage'].idxmax(), 'state_full']
-    lowest_state = state_avg_delay.loc[state_avg_delay['arr_del15_percentage'].idxmin(), 'state_full']
-    default_states = [highest_state, lowest_state]
-
-    # State selection
-    states = st.multiselect(
-        'Select 2 States to Compare',
-        options=state_avg_delay['state_full'].tolist(),
-        default=default_states,
-        max_selections=2,
-        help='Default: state with highest and lowest delay percentage.'
-    )
+px = lazy_import('plotly.express')
+
+# States, or any of the airports found through the search index, can be compared side by side
+COMPARE_ENTITIES = {'States': 'state', 'Airports': 'airport'}
+BOOTSTRAP_COLUMNS = {'state': 'airport_state', 'airport': 'airport'}
+AIRPORT_DEFAULT_MIN_FLIGHTS = 1000
+
+def state_delay_trend_and_cause(dataset_path, store, selected_years):
+    compare = st.radio("Compare", list(COMPARE_ENTITIES), horizontal=True, key='state_compare_entity')
+    entity = COMPARE_ENTITIES[compare]
+    singular = compare[:-1]
+
+    # Delay percentage per state (or airport) from the precomputed season sums, for the options and default picks
+    avg_delay = entity_metric(store, entity, 'delay_pct', selected_years)
+    if entity == 'state':
+        avg_delay = avg_delay[avg_delay.index.isin(state_abbrev_to_name.keys())]
+        names = state_abbrev_to_name
+        default_pool = avg_delay
+    else:
+        names = dict(zip(store.dims['airport'], store.labels.get('airport', store.dims['airport'])))
+        # Small airports swing wildly, so the default picks only look at busy ones
+        default_pool = entity_metric(store, 'airport', 'delay_pct', selected_years, min_flights=AIRPORT_DEFAULT_MIN_FLIGHTS)
+        default_pool = default_pool if not default_pool.empty else avg_delay
+    if avg_delay.empty:
+        st.warning("No data available for the selected filters.")
+        return
+
+    # Identify the entities with highest and lowest delay
+    default_entities = list(dict.fromkeys([top_k(default_pool, 1).index[0], top_k(default_pool, 1, largest=False).index[0]]))
+
+    # State or airport selection
+    if entity == 'state':
+        codes = st.multiselect(
+            'Select 2 States to Compare',
+            options=sorted(avg_delay.index, key=lambda code: state_abbrev_to_name[code]),
+            default=default_entities,
+            max_selections=2,
+            format_func=state_abbrev_to_name.get,
+            help='Default: state with highest and lowest delay percentage.'
+        )
+    else:
+        index = get_search_index(store)
+        codes = entity_picker(
+            index,
+            'airport',
+            'Select 2 Airports to Compare',
+            [code for code in index.keys('airport') if code in avg_delay.index],
+            default_entities,
+            help=f'Default: airport with highest and lowest delay percentage (of those with over {AIRPORT_DEFAULT_MIN_FLIGHTS:,} flights). Search by code, name, city or state.'
+        )
 
-    if len(states) != 2:
-        st.warning('Please select exactly 2 states.')
+    if len(codes) != 2:
+        st.warning(f'Please select exactly 2 {compare.lower()}.')
         return
+    selected = [names.get(code, code) for code in codes]
 
     # Title
     year_range = f"{min(selected_years)} - {max(selected_years)}" if len(selected_years) > 1 else f"{selected_years[0]}"
     st.markdown(
-        f"<h2 style='font-size: 24px;'>Delay Percentage Trend for {states[0]} and {states[1]}<br>"
+        f"<h2 style='font-size: 24px;'>Delay Percentage Trend for {selected[0]} and {selected[1]}<br>"
         f"<span style='font-size: 20px;'>({year_range})</span></h2>",
         unsafe_allow_html=True
     )
 
-    # Aggregate delay percentage per state per year
-    state_year = (
-        df[df['state_full'].isin(states)]
-        .groupby(['state_full', 'airline_year'])['arr_del15_percentage']
-        .mean()
-        .reset_index()
-        .rename(columns={'arr_del15_percentage': 'delay_pct'})
-    )
-
-    # Normalize airline_year for consistent labeling (e.g., '2013/2014')
-    state_year['airline_year'] = state_year['airline_year'].apply(normalize_airline_year)
+    # Flight-weighted delay percentage per entity per year, from the entity x season sums
+    entity_season = store.aggregate(keep=('season', entity), season=selected_years, **{entity: codes})
+    entity_year = entity_season.rename_axis(['airline_year', entity]).reset_index()
+    entity_year['name'] = entity_year[entity].map(lambda code: names.get(code, code))
+    entity_year['delay_pct'] = entity_year['arr_del15'] / entity_year['arr_flights'] * 100
 
     # Set a consistent order for categorical x-axis
-    year_order = sorted(state_year['airline_year'].unique(), key=lambda x: int(x.split('/')[0]))
-    state_year['airline_year'] = pd.Categorical(state_year['airline_year'], categories=year_order, ordered=True)
+    year_order = [season for season in selected_years if season in set(entity_year['airline_year'])]
 
     # Sort the data for clean plotting
-    state_year = state_year.sort_values(['state_full', 'airline_year'])
-    print(state_year)
+    entity_year = entity_year.sort_values(['name', 'airline_year'])
 
     # Line chart
     line_colors = ["#2A78C3", "#F5F9FF"]
     fig = px.line(
-        state_year,
+        entity_year,
         x='airline_year',
         y='delay_pct',
-        color='state_full',
+        color='name',
         color_discrete_sequence=line_colors,
         markers=True,
-        labels={'delay_pct': 'Percentage of Flight Delays (%)', 'airline_year': 'Year', 'state_full': 'State'},
+        labels={'delay_pct': 'Percentage of Flight Delays (%)', 'airline_year': 'Year', 'name': singular},
         height=350,
         category_orders={'airline_year': year_order}
     )
@@ -81,71 +101,37 @@ def state_delay_trend_and_cause(df, selected_years):
         hovertemplate='Year: <b>%{x}</b><br>Delay Percentage: <b>%{y:.2f}%</b><extra></extra>'
     )
     fig.update_layout(margin=dict(t=20, b=40, l=40, r=20))
+
+    # Next season's projection per state or airport (forecasts are keyed by code)
+    codes_by_name = dict(zip(selected, codes))
+    last_rows = entity_year.groupby('name', observed=True).last()
+    forecast = forecast_for_chart(store, year_order[-1], by=entity, entities=codes)
+    add_forecast_traces(fig, forecast, {
+        codes_by_name[trace.name]: (trace.name, last_rows.loc[trace.name, 'airline_year'], last_rows.loc[trace.name, 'delay_pct'], trace.line.color)
+        for trace in fig.data
+        if last_rows.loc[trace.name, 'airline_year'] == year_order[-1]
+    })
     st.plotly_chart(fig, use_container_width=True)
 
+    # Bootstrap interval and p-value for the gap between the two
+    significance_table(bootstrap_gap(dataset_path, BOOTSTRAP_COLUMNS[entity], codes, selected_years), selected)
+
     st.write("")
 
-    # Stacked bar chart for each selected state
+    # Stacked bar chart for each selected state or airport
+    breakdown = st.radio("Cause breakdown", list(CAUSE_BREAKDOWNS), horizontal=True, key='state_cause_breakdown')
     colA, colB = st.columns(2)
-    for idx, state in enumerate(states):
-        sdf = df[df['state_full'] == state]
-        if sdf.empty:
-            (colA if idx == 0 else colB).warning(f'No data for {state}')
+    for idx, (code, name) in enumerate(zip(codes, selected)):
+        if code not in entity_season.index.get_level_values(entity):
+            (colA if idx == 0 else colB).warning(f'No data for {name}')
             continue
 
         (colA if idx == 0 else colB).markdown(
-            f"<h2 style='font-size: 24px;'>Delay Cause Breakdown per Year: {state}<br>"
+            f"<h2 style='font-size: 24px;'>Delay Cause Breakdown per Year: {name}<br>"
             f"<span style='font-size: 20px;'>({year_range})</span></h2>",
             unsafe_allow_html=True
         )
 
-        delay_causes = [
-            ("carrier_ct", "Carrier", "#636EFA"),
-            ("weather_ct", "Weather", "#EF553B"),
-            ("nas_ct", "NAS (National Airspace System)", "#00CC96"),
-            ("security_ct", "Security", "#AB63FA"),
-            ("late_aircraft_ct", "Late Aircraft", "#FFA15A")
-        ]
-
-        yearly = sdf.groupby('airline_year')[[col[0] for col in delay_causes] + ['arr_flights']].sum().reset_index()
-        for col, _, _ in delay_causes:
-            yearly[col + '_pct'] = (yearly[col] / yearly['arr_flights']) * 100
-
-        fig2 = go.Figure()
-        for col, label, color in delay_causes:
-            formatted_values = yearly[col].apply(format_with_dots)
-            percentages = yearly[col + '_pct']
-            customdata = pd.DataFrame({'val': formatted_values, 'pct': percentages.round(2)}).values
-
-            fig2.add_trace(go.Bar(
-                x=yearly['airline_year'],
-                y=percentages,
-                name=label,
-                marker_color=color,
-                meta=[label] * len(yearly),
-                customdata=customdata,
-                hovertemplate=(
-                    '<b>%{x}</b><br>'
-                    '<b>%{meta}</b><br>'
-                    'Total Delay: <b>%{customdata[0]}</b><br>'
-                    'Percentage (of all flights): <b>%{customdata[1]:.2f}%</b><extra></extra>'
-                )
-            ))
-
-        fig2.update_layout(
-            barmode='stack',
-            xaxis=dict(title="Year", tickangle=45),
-            yaxis=dict(title="Percentage of Flight Delays (%)"),
-            height=500,
-            margin=dict(t=0, b=0, l=0, r=20),
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.05,
-                xanchor="center",
-                x=0.465,
-            )
-        )
-        fig2.update_annotations(font_size=16)
-        (colA if idx == 0 else colB).plotly_chart(fig2, use_container_width=True)
\ No newline at end of file
+        yearly = entity_season.xs(code, level=entity).rename_axis('airline_year').reset_index()
+        fig2 = build_cause_breakdown_figure(yearly, CAUSE_BREAKDOWNS[breakdown])
+        (colA if idx == 0 else colB).plotly_chart(fig2, use_container_width=True)
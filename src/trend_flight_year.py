@@ -1,33 +1,28 @@
 import streamlit as st
-import plotly.express as px
 
-from src.utils import format_with_dots, get_airline_year
+from src.delay_causes import CAUSE_COUNT_COLUMNS
+from src.disk_cache import disk_cached
+from src.forecast import add_forecast_traces, forecast_for_chart
+from src.startup import lazy_import
+from src.utils import format_with_dots
+
+px = lazy_import('plotly.express')
 
 ## Graph 1: Tren Penyebab Keterlambatan Penerbangan per Tahun
-@st.cache_data
-def preprocess_delay_data(df):
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
+def preprocess_delay_data(store, selected_years):
+    # Partial seasons never reach here: the year slider only offers complete airline years
+    yearly = store.aggregate(keep=('season',), season=selected_years)
 
-    df['total_delay'] = df[
-        ['carrier_ct', 'weather_ct', 'nas_ct', 'security_ct', 'late_aircraft_ct']
-    ].sum(axis=1)
+    total_delay = yearly[CAUSE_COUNT_COLUMNS].sum(axis=1).rename('total_delay').rename_axis('airline_year').reset_index()
+    total_flights = yearly['arr_flights'].rename_axis('airline_year').reset_index()
 
-    total_delay = df.groupby('airline_year')['total_delay'].sum().reset_index()
-    total_flights = df.groupby('airline_year')['arr_flights'].sum().reset_index()
-    
     percentage_of_delay_flights = (total_delay['total_delay'] / total_flights['arr_flights']) * 100
 
-    # Remove incomplete final year if applicable
-    if total_delay['airline_year'].iloc[-1] == '2023/2024':
-        percentage_of_delay_flights = percentage_of_delay_flights[:-1]
-
     return total_delay, total_flights, percentage_of_delay_flights
 
-def trend_flight_year(df, selected_years):
-    df['airline_year'] = df.apply(get_airline_year, axis=1)
-    df = df[df['airline_year'].isin(selected_years)]
-
-    total_delay, total_flights, percentage_of_delay_flights = preprocess_delay_data(df)
+@disk_cached('delay_trend_frame')
+def build_delay_trend_frame(store, selected_years):
+    total_delay, total_flights, percentage_of_delay_flights = preprocess_delay_data(store, selected_years)
 
     merged_df = total_delay.copy()
     merged_df['total_flights'] = total_flights['arr_flights']
@@ -35,6 +30,43 @@ def trend_flight_year(df, selected_years):
     merged_df['pct_change'] = merged_df['percentage'].pct_change() * 100
     merged_df['hover_pct'] = merged_df['percentage'].map(lambda x: f"{x:.2f}%")
     merged_df['Type'] = 'Delay Percentage'
+    return merged_df
+
+# Figure spec for the line chart, cached on disk so restarted processes skip plotly express
+@disk_cached('delay_trend_forecast_figure')
+def build_delay_trend_figure(store, selected_years):
+    merged_df = build_delay_trend_frame(store, selected_years)
+
+    fig = px.line(
+        merged_df,
+        x='airline_year',
+        y='percentage',
+        markers=True,
+        color='Type',
+        hover_data={'hover_pct': True, 'percentage': False, 'Type': False},
+        height=350
+    )
+    fig.update_traces(
+        hovertemplate=
+            'Year: <b>%{x}</b><br>'
+            'Delay Percentage: <b>%{customdata[0]}<extra></extra></b>'
+    )
+    fig.update_layout(
+        xaxis_title="Year",
+        yaxis_title="Percentage of Flight Delays (%)",
+        margin=dict(t=20, b=40, l=40, r=20),
+        showlegend=False,
+    )
+
+    # Next season's projection when the chart reaches the last full season
+    if not merged_df.empty:
+        last = merged_df.iloc[-1]
+        forecast = forecast_for_chart(store, last['airline_year'])
+        add_forecast_traces(fig, forecast, {'All': ('All flights', last['airline_year'], last['percentage'], fig.data[0].line.color)})
+    return fig.to_dict()
+
+def trend_flight_year(store, selected_years):
+    merged_df = build_delay_trend_frame(store, selected_years)
 
     if len(merged_df) < 2:
         st.warning("Not enough years selected to compute trends.")
@@ -118,25 +150,4 @@ def trend_flight_year(df, selected_years):
     st.markdown(f"<h2 style='font-size: 24px;'>Flight Delays Trend Across Years<br><span style='font-size: 20px;'>({year_range})</span></h2>", unsafe_allow_html=True)    
 
     # === Line Chart ===
-    fig = px.line(
-        merged_df,
-        x='airline_year',
-        y='percentage',
-        markers=True,
-        color='Type',
-        hover_data={'hover_pct': True, 'percentage': False, 'Type': False},
-        height=350
-    )
-    fig.update_traces(
-        hovertemplate=
-            'Year: <b>%{x}</b><br>'
-            'Delay Percentage: <b>%{customdata[0]}<extra></extra></b>'
-    )
-    fig.update_layout(
-        xaxis_title="Year",
-        yaxis_title="Percentage of Flight Delays (%)",
-        margin=dict(t=20, b=40, l=40, r=20),
-        showlegend=False,
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    st.plotly_chart(build_delay_trend_figure(store, selected_years), use_container_width=True)
\ No newline at end of file
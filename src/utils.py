@@ -10,6 +10,13 @@ def format_with_dots(val):
     s = f"{val:,.0f}"
     return s
 
+# Human readable byte size for cache usage reports
+def format_bytes(size):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
 # Function to get the two-month span for metrics display
 def get_two_month_span(idx, total_delay):
     if idx > 0:
@@ -22,4 +29,14 @@ def normalize_airline_year(year_str):
     first = parts[0]
     if len(first) == 2:
         first = '20' + first  # misalnya '22' jadi '2022'
-    return f"{first}/{parts[1]}"
\ No newline at end of file
+    return f"{first}/{parts[1]}"
+
+# Vectorized version of get_airline_year for a whole DataFrame
+def get_airline_year_column(df):
+    start_year = df['year'].where(df['month'] >= 8, df['year'] - 1)
+    return start_year.astype(str) + '/' + (start_year + 1).astype(str)
+
+# Calendar (year, month) pairs that make up an airline year, from August to July
+def get_airline_year_months(airline_year):
+    start_year = int(normalize_airline_year(airline_year).split('/')[0])
+    return [(start_year, m) for m in range(8, 13)] + [(start_year + 1, m) for m in range(1, 8)]